@@ -0,0 +1,62 @@
+import os, sys, time, random, argparse, tempfile, shutil
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), "src"))
+
+from oos.history_store import HistoryStore
+
+def fake_run(rng, cameras, oos_rate, W=1920):
+    """{image: gap boxes} for one run; a few cameras stay out of stock for long stretches."""
+    regions = {}
+    for c in range(cameras):
+        sticky = c % 10 == 0
+        n = rng.randint(1, 3) if (sticky or rng.random() < oos_rate) else 0
+        regions[f"cam{c:03d}.jpg"] = [[x, 100, x + 120, 300] for x in (rng.uniform(0, W - 120) for _ in range(n))]
+    return regions
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter(); out = fn(); best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def main():
+    ap = argparse.ArgumentParser(description="Fill a history store with synthetic runs and time ingest + queries.")
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--runs_per_day", type=int, default=24)
+    ap.add_argument("--cameras", type=int, default=100)
+    ap.add_argument("--oos_rate", type=float, default=0.05)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--keep", default="", help="Write the store here instead of a temp dir")
+    args = ap.parse_args()
+
+    d = tempfile.mkdtemp(prefix="oos_hist_")
+    path = args.keep or os.path.join(d, "history.sqlite")
+    rng = random.Random(args.seed)
+    try:
+        store = HistoryStore(path)
+        t0 = time.perf_counter()
+        start, step = 1_700_000_000.0, 86400.0 / args.runs_per_day
+        n_runs = args.days * args.runs_per_day
+        for r in range(n_runs):
+            store.add_run(start + r * step, fake_run(rng, args.cameras, args.oos_rate))
+        dt = time.perf_counter() - t0
+        print(f"  ingest: {n_runs} runs x {args.cameras} cameras in {dt:.1f}s ({n_runs*args.cameras/dt:,.0f} obs/s)")
+        end = start + n_runs * step
+        checks = {
+            "persistent(camera, >=3)": lambda: store.persistent(3),
+            "persistent(slot, >=3)": lambda: store.persistent(3, "slot"),
+            "summary(last 7 days)": lambda: store.summary(end - 7 * 86400, end),
+            "summary(camera, full year)": lambda: store.summary(camera="cam042"),
+            "timeline(camera, last 30 days)": lambda: store.timeline("cam042", end - 30 * 86400, end),
+        }
+        for name, fn in checks.items():
+            t, rows = timed(fn)
+            print(f"  {name:<32s} {t*1000:8.2f} ms  ({len(rows)} rows)")
+        store.close()
+    finally:
+        if not args.keep:
+            shutil.rmtree(d, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
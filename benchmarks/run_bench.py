@@ -0,0 +1,168 @@
+import os, sys, json, time, argparse, platform, subprocess, tempfile, shutil
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(os.path.dirname(HERE), "src")
+sys.path.insert(0, SRC)
+sys.path.insert(0, HERE)
+
+from synth_shelves import generate
+
+# size sweeps: number of images x boxes per row (density); rows and gap rate fixed
+SWEEPS = {
+    "quick": [(20, 10), (100, 20), (200, 40)],
+    "full":  [(100, 10), (500, 20), (1000, 40), (2000, 80)],
+}
+
+# report meta that changes the work being timed; baselines must match on these
+WORKLOAD_META = ("sweep", "seed", "rows", "gap_rate", "bootstrap")
+
+def best_of(fn, repeat):
+    fn()  # untimed warm-up: lazy imports (numpy, cv2) and cold caches stay out of the samples
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+def run_cli(command, *args):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = SRC + os.pathsep + env.get("PYTHONPATH", "")
+    cmd = [sys.executable, "-m", "oos", command, *map(str, args)]
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, env=env)
+
+def bench_size(work, n_images, boxes_per_row, rows, gap_rate, seed, repeat, bootstrap_B, skip_cli=False):
+    from oos.oos_row_gap import group_rows, gaps_in_row
+    from oos.oos_eval_bootstrap import precision_recall, bootstrap_ci
+    from oos.csv_to_yolo_sku110k_v2 import convert_csv
+
+    d = os.path.join(work, f"n{n_images}_b{boxes_per_row}")
+    p = generate(d, n_images=n_images, rows=rows, boxes_per_row=boxes_per_row,
+                 gap_rate=gap_rate, seed=seed, write_images=not skip_cli)
+    with open(p["detections_json"], "r", encoding="utf-8") as f:
+        det = json.load(f)
+    with open(p["pred_json"], "r", encoding="utf-8") as f:
+        pred = json.load(f)
+    with open(p["gt_json"], "r", encoding="utf-8") as f:
+        gt = json.load(f)
+    grouped = {fn: [[boxes[i] for i in r["idxs"]] for r in group_rows(boxes, 30)] for fn, boxes in det.items()}
+
+    tag = f"n={n_images},bpr={boxes_per_row}"
+    res = {}
+    res[f"group_rows[{tag}]"] = best_of(lambda: [group_rows(b, 30) for b in det.values()], repeat)
+    res[f"gaps_in_row[{tag}]"] = best_of(lambda: [gaps_in_row(r) for rs in grouped.values() for r in rs], repeat)
+    res[f"precision_recall[{tag}]"] = best_of(lambda: precision_recall(pred, gt, 0.3), repeat)
+    res[f"bootstrap_ci[{tag},B={bootstrap_B}]"] = best_of(lambda: bootstrap_ci(pred, gt, 0.3, B=bootstrap_B), repeat)
+    lbl_dir = os.path.join(d, "labels")
+    res[f"convert_csv[{tag}]"] = best_of(lambda: convert_csv(p["annotations_csv"], p["images_dir"], lbl_dir), repeat)
+
+    if not skip_cli:
+        out = os.path.join(d, "oos_out")
+        res[f"cli:gaps[{tag}]"] = best_of(lambda: run_cli(
+            "gaps", "--detections_json", p["detections_json"], "--images_dir", p["images_dir"],
+            "--out_dir", out, "--max_vis", 50), repeat)
+        res[f"cli:eval[{tag}]"] = best_of(lambda: run_cli(
+            "eval", "--pred_json", p["pred_json"], "--gt_json", p["gt_json"],
+            "--bootstrap", bootstrap_B), repeat)
+        res[f"cli:csv2yolo[{tag}]"] = best_of(lambda: run_cli(
+            "csv2yolo", "--csv_path", p["annotations_csv"], "--images_dir", p["images_dir"],
+            "--out_dir", lbl_dir), repeat)
+        res[f"cli:csv2gt[{tag}]"] = best_of(lambda: run_cli(
+            "csv2gt", "--csv_path", p["oos_gt_csv"], "--out_json", os.path.join(d, "gt_from_csv.json")), repeat)
+    return res
+
+def upgrade_keys(baseline):
+    """Map pre-package result names (cli:oos_row_gap[...]) to today's subcommands (cli:gaps[...])."""
+    from oos.cli import ALIASES
+    out = {}
+    for name, v in baseline.items():
+        if name.startswith("cli:"):
+            cmd, sep, tag = name[4:].partition("[")
+            name = f"cli:{ALIASES.get(cmd, cmd)}{sep}{tag}"
+        out[name] = v
+    return out
+
+def meta_mismatch(meta, base_meta):
+    """[(key, baseline, current)] for workload parameters that differ between two reports."""
+    return [(k, base_meta.get(k), meta.get(k)) for k in WORKLOAD_META if base_meta.get(k) != meta.get(k)]
+
+def compare(current, baseline, threshold):
+    """Return [(name, base_s, cur_s, ratio)] for benchmarks slower than baseline by more than threshold."""
+    slow = []
+    for name, cur in current.items():
+        base = baseline.get(name)
+        if base is None or base <= 0:
+            continue
+        ratio = cur / base
+        if ratio > 1.0 + threshold:
+            slow.append((name, base, cur, ratio))
+    return slow
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark hot OOS functions and CLIs on seeded synthetic shelves.")
+    ap.add_argument("--sweep", choices=sorted(SWEEPS), default="quick")
+    ap.add_argument("--rows", type=int, default=5)
+    ap.add_argument("--gap_rate", type=float, default=0.05)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=3, help="Runs per benchmark; the fastest is kept")
+    ap.add_argument("--bootstrap", type=int, default=100, help="Bootstrap iterations for bootstrap_ci")
+    ap.add_argument("--skip_cli", action="store_true", help="Only time functions (no images, no subprocesses)")
+    ap.add_argument("--out_json", default="outputs/bench_results.json")
+    ap.add_argument("--baseline", default="", help="Results JSON from an earlier run to compare against")
+    ap.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown vs baseline (0.2 = 20%%)")
+    ap.add_argument("--keep_data", default="", help="Keep the generated data in this dir instead of a temp dir")
+    args = ap.parse_args()
+
+    meta = {"python": platform.python_version(), "platform": platform.platform(),
+            "sweep": args.sweep, "seed": args.seed, "repeat": args.repeat,
+            "rows": args.rows, "gap_rate": args.gap_rate, "bootstrap": args.bootstrap}
+    if args.baseline:
+        # check before timing anything: a baseline with other parameters gives bogus ratios
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            base_report = json.load(f)
+        base = upgrade_keys(base_report["results"])
+        if "meta" not in base_report:
+            print(f"[WARN] {args.baseline} has no meta; cannot check it was run with the same parameters")
+        else:
+            diff = meta_mismatch(meta, base_report["meta"])
+            for k, b, c in diff:
+                print(f"[ERROR] {k}: baseline {b!r} vs current {c!r}")
+            if diff:
+                sys.exit(f"[ERROR] {args.baseline} was recorded with different parameters; rerun with the same "
+                         f"{', '.join(k for k, _, _ in diff)}")
+            for k in ("python", "platform", "repeat"):
+                if base_report["meta"].get(k) != meta[k]:
+                    print(f"[WARN] {k} differs from the baseline ({base_report['meta'].get(k)!r} vs {meta[k]!r})")
+
+    work = args.keep_data or tempfile.mkdtemp(prefix="oos_bench_")
+    results = {}
+    try:
+        for n_images, bpr in SWEEPS[args.sweep]:
+            r = bench_size(work, n_images, bpr, args.rows, args.gap_rate, args.seed,
+                           args.repeat, args.bootstrap, args.skip_cli)
+            for k, v in r.items():
+                print(f"  {k:<60s} {v*1000:10.2f} ms")
+            results.update(r)
+    finally:
+        if not args.keep_data:
+            shutil.rmtree(work, ignore_errors=True)
+
+    report = {"meta": meta, "results": results}
+    os.makedirs(os.path.dirname(args.out_json) or ".", exist_ok=True)
+    with open(args.out_json, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"[OK] wrote {len(results)} timings to {args.out_json}")
+
+    if args.baseline:
+        matched = len(set(results) & set(base))
+        if not matched:
+            print(f"[WARN] no benchmark names in common with {args.baseline}; nothing compared")
+        slow = compare(results, base, args.threshold)
+        for name, b, c, ratio in slow:
+            print(f"[REGRESSION] {name}: {b*1000:.2f} ms -> {c*1000:.2f} ms (x{ratio:.2f})")
+        if slow:
+            sys.exit(1)
+        print(f"[OK] no regressions beyond {args.threshold:.0%} vs {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import os, sys, json, time, argparse, subprocess, tempfile, shutil
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(os.path.dirname(HERE), "src")
+sys.path.insert(0, HERE)
+
+from synth_shelves import generate
+
+def oos(*args):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = SRC + os.pathsep + env.get("PYTHONPATH", "")
+    return subprocess.run([sys.executable, "-m", "oos", *map(str, args)], check=True,
+                          capture_output=True, text=True, env=env).stdout
+
+def report_lines(stdout):
+    return [ln for ln in stdout.splitlines() if ln.startswith(("Base", "Bootstrap", "95%"))]
+
+def node(work, d, p, i):
+    """One shard end to end: gaps on the shard's images, then per-image eval counts."""
+    shard = os.path.join(work, f"shard_{i:03d}.json")
+    gaps_dir = os.path.join(work, f"gaps_{i}")
+    oos("gaps", "--detections_json", p["detections_json"], "--images_dir", d, "--manifest", shard,
+        "--split", "test", "--out_dir", gaps_dir, "--max_vis", 0)
+    counts = os.path.join(work, f"counts_{i}.json")
+    oos("eval", "--pred_json", os.path.join(gaps_dir, "oos_regions.json"), "--gt_json", p["gt_json"],
+        "--manifest", shard, "--split", "test", "--counts_out", counts)
+    return os.path.join(gaps_dir, "oos_regions.json"), counts
+
+def main():
+    ap = argparse.ArgumentParser(description="Run gaps+eval on N local processes standing in for nodes and check the reduce is exact.")
+    ap.add_argument("--n_images", type=int, default=2000)
+    ap.add_argument("--boxes_per_row", type=int, default=40)
+    ap.add_argument("--nodes", default="1,2,4", help="Comma-separated node counts to try")
+    ap.add_argument("--bootstrap", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    d = tempfile.mkdtemp(prefix="oos_shard_")
+    try:
+        p = generate(d, n_images=args.n_images, boxes_per_row=args.boxes_per_row, seed=args.seed, write_images=False)
+        with open(p["detections_json"], "r", encoding="utf-8") as f:
+            names = sorted(json.load(f))
+        manifest = os.path.join(d, "manifest.json")
+        with open(manifest, "w", encoding="utf-8") as f:
+            json.dump({"test": names}, f)
+
+        # single-node reference: plain gaps + eval over everything
+        t0 = time.perf_counter()
+        oos("gaps", "--detections_json", p["detections_json"], "--images_dir", d, "--out_dir",
+            os.path.join(d, "gaps_ref"), "--max_vis", 0)
+        ref = report_lines(oos("eval", "--pred_json", os.path.join(d, "gaps_ref", "oos_regions.json"),
+                               "--gt_json", p["gt_json"], "--bootstrap", args.bootstrap))
+        t_ref = time.perf_counter() - t0
+        print(f"  reference (1 process, no sharding): {t_ref:.2f}s")
+
+        ok = True
+        for n in [int(v) for v in args.nodes.split(",") if v]:
+            work = os.path.join(d, f"nodes_{n}")
+            t0 = time.perf_counter()
+            oos("shard", "plan", "--root", d, "--split", "test", "--manifest_in", manifest, "--shards", n,
+                "--by", "json", "--boxes_json", p["detections_json"], "--out_dir", work)
+            with ThreadPoolExecutor(max_workers=n) as ex:
+                parts = list(ex.map(lambda i: node(work, d, p, i), range(n)))
+            oos("shard", "merge", "--inputs", *[r for r, _ in parts], "--out_json", os.path.join(work, "oos_regions.json"))
+            got = report_lines(oos("shard", "eval", "--counts", *[c for _, c in parts], "--bootstrap", args.bootstrap))
+            dt = time.perf_counter() - t0
+            same = got == ref
+            ok &= same
+            print(f"  {n} node(s): {dt:.2f}s  speedup x{t_ref/dt:.2f}  reduce {'exact' if same else 'DIFFERS'}")
+            if not same:
+                print("    reference: " + " | ".join(ref)); print("    reduced:   " + " | ".join(got))
+    finally:
+        shutil.rmtree(d, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import os, sys, json, time, argparse, subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(os.path.dirname(HERE), "src")
+
+# seconds of wall time for `oos <cmd> --help`, interpreter start included
+BUDGETS = {
+    "eval": 0.15,
+    "qc": 0.15,
+    "csv2gt": 0.15,
+    "remap": 0.15,
+    "store": 0.15,
+    "gaps": 0.15,
+}
+HEAVY = ("cv2", "numpy", "PIL", "torch", "ultralytics")
+
+def env_with_src():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = SRC + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+def time_help(cmd, repeat, env):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "oos", cmd, "--help"], check=True,
+                       stdout=subprocess.DEVNULL, env=env)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def time_help_baseline(repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def heavy_imports(cmd, env):
+    """Heavy modules pulled in by importing the subcommand's module."""
+    from_cli = ("import sys, importlib; from oos.cli import COMMANDS; "
+                f"importlib.import_module('oos.' + COMMANDS[{cmd!r}][0]); "
+                f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", from_cli], check=True,
+                         capture_output=True, text=True, env=env).stdout.strip()
+    return [m for m in out.split(",") if m]
+
+def main():
+    ap = argparse.ArgumentParser(description="Check `oos` startup time against per-subcommand budgets.")
+    ap.add_argument("--repeat", type=int, default=5, help="Runs per subcommand; the fastest is kept")
+    ap.add_argument("--scale", type=float, default=1.0, help="Multiply all budgets (slow CI machines)")
+    ap.add_argument("--out_json", default="", help="Optional results JSON")
+    args = ap.parse_args()
+
+    env = env_with_src()
+    base = time_help_baseline(args.repeat)
+    print(f"  bare interpreter: {base*1000:.1f} ms")
+    results, failed = {}, False
+    for cmd, budget in BUDGETS.items():
+        t = time_help(cmd, args.repeat, env)
+        heavy = heavy_imports(cmd, env)
+        ok = t <= budget * args.scale and not heavy
+        failed |= not ok
+        results[cmd] = {"seconds": t, "budget": budget * args.scale, "heavy_imports": heavy, "ok": ok}
+        extra = f"  heavy imports: {heavy}" if heavy else ""
+        print(f"  {'OK ' if ok else 'OVER'} oos {cmd:<8s} {t*1000:7.1f} ms (budget {budget*args.scale*1000:.0f} ms){extra}")
+    if args.out_json:
+        os.makedirs(os.path.dirname(args.out_json) or ".", exist_ok=True)
+        with open(args.out_json, "w", encoding="utf-8") as f:
+            json.dump({"interpreter_s": base, "commands": results}, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import os, csv, json, argparse, random
+
+def make_image(rng, W, H, rows, boxes_per_row, gap_rate):
+    """One synthetic shelf: products on `rows` shelves, each slot empty with prob gap_rate.
+
+    Returns (products, gaps) in pixel xyxy. Gaps follow oos_row_gap semantics: a run
+    of empty slots between two products becomes one gap box spanning their overlap.
+    """
+    products, gaps = [], []
+    row_h = H / float(rows)
+    slot_w = W / float(boxes_per_row)
+    for r in range(rows):
+        y_top = r * row_h
+        row = []
+        for s in range(boxes_per_row):
+            if rng.random() < gap_rate:
+                row.append(None)
+                continue
+            jx = rng.uniform(-0.05, 0.05) * slot_w
+            jy = rng.uniform(-0.05, 0.05) * row_h
+            x1 = s * slot_w + 0.08 * slot_w + jx
+            x2 = (s + 1) * slot_w - 0.08 * slot_w + jx
+            y1 = y_top + 0.15 * row_h + jy
+            y2 = y_top + 0.9 * row_h + jy
+            b = [round(max(0.0, x1), 1), round(max(0.0, y1), 1), round(min(W, x2), 1), round(min(H, y2), 1)]
+            row.append(b)
+            products.append(b)
+        prev = None
+        empty = 0
+        for b in row:
+            if b is None:
+                empty += 1
+                continue
+            if prev is not None and empty:
+                y1 = max(prev[1], b[1]); y2 = min(prev[3], b[3])
+                if y2 > y1:
+                    gaps.append([prev[2], y1, b[0], y2])
+            prev, empty = b, 0
+    return products, gaps
+
+def jitter_preds(rng, gaps, W, H, miss_rate=0.1, fp_rate=0.1):
+    # noisy copy of the GT gaps: drop some, shift the rest, add a few false positives
+    out = []
+    for g in gaps:
+        if rng.random() < miss_rate:
+            continue
+        dx = rng.uniform(-0.05, 0.05) * (g[2] - g[0])
+        out.append([g[0] + dx, g[1], g[2] + dx, g[3]])
+    n_fp = sum(1 for _ in gaps if rng.random() < fp_rate)
+    for _ in range(n_fp):
+        x = rng.uniform(0, W * 0.9); y = rng.uniform(0, H * 0.9)
+        out.append([x, y, x + W * 0.05, y + H * 0.1])
+    return out
+
+def generate(out_dir, n_images=100, rows=5, boxes_per_row=20, gap_rate=0.05,
+             W=1920, H=1080, seed=0, write_images=True):
+    """Write a synthetic dataset under out_dir; returns a dict of the produced paths."""
+    rng = random.Random(seed)
+    img_dir = os.path.join(out_dir, "images")
+    os.makedirs(img_dir, exist_ok=True)
+    det, gt, pred = {}, {}, {}
+    ann_rows, gt_rows = [], []
+    for i in range(n_images):
+        fn = f"synth_{i:06d}.jpg"
+        products, gaps = make_image(rng, W, H, rows, boxes_per_row, gap_rate)
+        det[fn] = products
+        gt[fn] = gaps
+        pred[fn] = jitter_preds(rng, gaps, W, H)
+        # SKU-110K headerless order: image,x1,y1,x2,y2,class,width,height
+        ann_rows += [[fn, *b, "object", W, H] for b in products]
+        gt_rows += [[fn, *map(int, g)] for g in gaps]
+        if write_images:
+            write_shelf_image(os.path.join(img_dir, fn), W, H, products)
+
+    paths = {
+        "images_dir": img_dir,
+        "detections_json": os.path.join(out_dir, "detections.json"),
+        "gt_json": os.path.join(out_dir, "oos_gt.json"),
+        "pred_json": os.path.join(out_dir, "oos_pred.json"),
+        "annotations_csv": os.path.join(out_dir, "annotations.csv"),
+        "oos_gt_csv": os.path.join(out_dir, "oos_gt.csv"),
+    }
+    for key, obj in (("detections_json", det), ("gt_json", gt), ("pred_json", pred)):
+        with open(paths[key], "w", encoding="utf-8") as f:
+            json.dump(obj, f)
+    for key, rows_ in (("annotations_csv", ann_rows), ("oos_gt_csv", gt_rows)):
+        with open(paths[key], "w", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerows(rows_)
+    return paths
+
+def write_shelf_image(path, W, H, products):
+    from PIL import Image, ImageDraw
+    im = Image.new("RGB", (W, H), (200, 200, 200))
+    d = ImageDraw.Draw(im)
+    for x1, y1, x2, y2 in products:
+        d.rectangle([x1, y1, x2, y2], fill=(60, 90, 160))
+    im.save(path, quality=80)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Generate a seeded synthetic shelf dataset (detections, GT, CSV, images).")
+    ap.add_argument("--out_dir", required=True)
+    ap.add_argument("--n_images", type=int, default=100)
+    ap.add_argument("--rows", type=int, default=5, help="Shelf rows per image")
+    ap.add_argument("--boxes_per_row", type=int, default=20, help="Product slots per row (box density)")
+    ap.add_argument("--gap_rate", type=float, default=0.05, help="Probability that a slot is empty")
+    ap.add_argument("--width", type=int, default=1920)
+    ap.add_argument("--height", type=int, default=1080)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--no_images", action="store_true", help="Skip writing JPEGs")
+    args = ap.parse_args()
+    paths = generate(args.out_dir, args.n_images, args.rows, args.boxes_per_row, args.gap_rate,
+                     args.width, args.height, args.seed, write_images=not args.no_images)
+    print("[OK] synthetic dataset:")
+    for k, v in paths.items():
+        print(f"  {k}: {v}")
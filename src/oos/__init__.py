@@ -0,0 +1,7 @@
+"""Lightweight out-of-stock (OOS) detection toolkit.
+
+Each module mirrors one of the original scripts and exposes ``main(argv=None)``;
+``oos <command>`` (see :mod:`oos.cli`) dispatches to them.
+"""
+
+__version__ = "0.1.0"
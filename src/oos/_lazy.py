@@ -0,0 +1,27 @@
+import importlib
+
+class LazyModule:
+    """Stand-in for a heavy module (cv2, numpy, PIL, ...) imported on first attribute access.
+
+    Lets modules keep `cv2.imread(...)` style code while `--help` and code paths
+    that never touch the dependency skip its import cost entirely.
+    """
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_mod"] = None
+
+    def _load(self):
+        mod = self.__dict__["_mod"]
+        if mod is None:
+            mod = self.__dict__["_mod"] = importlib.import_module(self.__dict__["_name"])
+        return mod
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_mod"] is not None else "not loaded"
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+def lazy_import(name):
+    return LazyModule(name)
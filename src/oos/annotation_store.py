@@ -0,0 +1,171 @@
+import os, sys, csv, time, atexit, signal, sqlite3, argparse
+from .csv_to_oos_gt import add_image_keys, read_csv_boxes, write_gt
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (filename TEXT PRIMARY KEY, updated REAL);
+CREATE TABLE IF NOT EXISTS boxes (filename TEXT NOT NULL, x1 REAL, y1 REAL, x2 REAL, y2 REAL);
+CREATE INDEX IF NOT EXISTS boxes_fn ON boxes(filename);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+def default_store_path(csv_path):
+    return csv_path + ".sqlite"
+
+class AnnotationStore:
+    """Per-image box store backed by SQLite; replaces rewriting the whole CSV on every save.
+
+    Each upsert is a single transaction touching only that image's rows, so a
+    crash leaves either the old or the new rows. The CSV and GT JSON are exports;
+    a seed CSV is re-exported on close, at exit and on SIGTERM if anything changed.
+    """
+    def __init__(self, path, seed_csv=None):
+        fresh = not os.path.exists(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.seed_csv = seed_csv
+        self.dirty = False
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        if seed_csv and os.path.exists(seed_csv):
+            if fresh:
+                # first open next to an existing CSV: import it once
+                with self.conn:
+                    for fn, boxes in read_csv_boxes(seed_csv).items():
+                        self._replace(fn, boxes)
+                self._mark_csv(seed_csv)
+            else:
+                self._sync_seed(seed_csv)
+        if seed_csv:
+            atexit.register(self.close)
+            try:
+                if signal.getsignal(signal.SIGTERM) == signal.SIG_DFL:
+                    signal.signal(signal.SIGTERM, lambda *a: sys.exit(128 + signal.SIGTERM))  # run atexit
+            except ValueError:
+                pass  # not the main thread
+
+    def _mark_csv(self, csv_path):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?,?)",
+                              ("csv_mtime:" + os.path.abspath(csv_path), repr(os.path.getmtime(csv_path))))
+
+    def _sync_seed(self, csv_path):
+        """Re-import images edited in the CSV since the store last wrote/read it; newer store edits win.
+
+        Images whose rows were removed from the CSV lose their boxes (they stay marked reviewed).
+        """
+        row = self.conn.execute("SELECT value FROM meta WHERE key=?", ("csv_mtime:" + os.path.abspath(csv_path),)).fetchone()
+        mt = os.path.getmtime(csv_path)
+        if row is None or mt <= float(row[0]):
+            if row is None:
+                self._mark_csv(csv_path)  # store from before this check: start tracking now
+            return
+        updated = dict(self.conn.execute("SELECT filename, updated FROM images"))
+        rounded = lambda boxes: [[int(v) for v in b[:4]] for b in boxes]  # the CSV holds int pixels
+        csv_boxes = read_csv_boxes(csv_path)
+        with_boxes = [fn for (fn,) in self.conn.execute("SELECT DISTINCT filename FROM boxes")]
+        n = n_del = 0
+        with self.conn:
+            for fn, boxes in csv_boxes.items():
+                if updated.get(fn, 0) < mt and rounded(boxes) != rounded(self.get(fn)):
+                    self._replace(fn, boxes); n += 1
+            for fn in with_boxes:
+                if fn not in csv_boxes and updated.get(fn, 0) < mt:
+                    self._replace(fn, []); n_del += 1
+        print(f"[WARN] {csv_path} was edited outside the store; re-imported {n} changed images, "
+              f"cleared {n_del} removed ones (store edits newer than the CSV kept)")
+        self._mark_csv(csv_path)
+
+    def _replace(self, filename, boxes):
+        self.conn.execute("DELETE FROM boxes WHERE filename=?", (filename,))
+        self.conn.executemany("INSERT INTO boxes VALUES (?,?,?,?,?)",
+                              [(filename, *map(float, b[:4])) for b in boxes])
+        self.conn.execute("INSERT OR REPLACE INTO images VALUES (?,?)", (filename, time.time()))
+
+    def upsert(self, filename, boxes):
+        """Replace all boxes of 'filename' (list of [x1,y1,x2,y2]); [] marks it reviewed with no boxes."""
+        with self.conn:
+            self._replace(filename, boxes)
+        self.dirty = True
+
+    def edit_boxes(self, filename, add=(), remove=()):
+        """Add / remove single boxes of 'filename' (matched on exact coords), keeping its other boxes."""
+        match = "filename=? AND x1=? AND y1=? AND x2=? AND y2=?"
+        with self.conn:
+            for b in remove:
+                self.conn.execute(f"DELETE FROM boxes WHERE {match}", (filename, *map(float, b[:4])))
+            for b in add:
+                row = (filename, *map(float, b[:4]))
+                if self.conn.execute(f"SELECT 1 FROM boxes WHERE {match} LIMIT 1", row).fetchone() is None:
+                    self.conn.execute("INSERT INTO boxes VALUES (?,?,?,?,?)", row)
+            self.conn.execute("INSERT OR REPLACE INTO images VALUES (?,?)", (filename, time.time()))
+        self.dirty = True
+
+    def upsert_rows(self, filename, rows):
+        """Same as upsert, for tool rows shaped [fn,x1,y1,x2,y2]."""
+        self.upsert(filename, [r[1:5] for r in rows])
+
+    def get(self, filename):
+        cur = self.conn.execute("SELECT x1,y1,x2,y2 FROM boxes WHERE filename=? ORDER BY rowid", (filename,))
+        return [list(r) for r in cur]
+
+    def all_boxes(self):
+        gt = {fn: [] for (fn,) in self.conn.execute("SELECT filename FROM images")}
+        for fn, x1, y1, x2, y2 in self.conn.execute("SELECT filename,x1,y1,x2,y2 FROM boxes ORDER BY filename, rowid"):
+            gt.setdefault(fn, []).append([x1, y1, x2, y2])
+        return gt
+
+    def export_csv(self, csv_path):
+        # write to a temp file and swap so a crash mid-export never truncates the CSV
+        os.makedirs(os.path.dirname(csv_path) or ".", exist_ok=True)
+        tmp = csv_path + ".tmp"
+        n = 0
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            for fn, x1, y1, x2, y2 in self.conn.execute("SELECT filename,x1,y1,x2,y2 FROM boxes ORDER BY filename, rowid"):
+                w.writerow([fn, int(x1), int(y1), int(x2), int(y2)]); n += 1
+        os.replace(tmp, csv_path)
+        self._mark_csv(csv_path)
+        if self.seed_csv and os.path.abspath(csv_path) == os.path.abspath(self.seed_csv):
+            self.dirty = False
+        return n
+
+    def export_gt_json(self, out_json, images_dir=""):
+        gt = self.all_boxes()
+        if images_dir:
+            add_image_keys(gt, images_dir)
+        write_gt(gt, out_json)
+        return len(gt)
+
+    def close(self):
+        if self.conn is None:
+            return
+        if self.dirty and self.seed_csv:
+            # a crash / Ctrl-C / SIGTERM must not leave the CSV that `oos eval` reads silently stale
+            n = self.export_csv(self.seed_csv)
+            print(f"[OK] exported {n} boxes to {self.seed_csv}")
+        self.conn.close()
+        self.conn = None
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Export an annotation store to the filename,x1,y1,x2,y2 CSV and/or GT JSON.")
+    ap.add_argument("--store", required=True, help=r"Store written by the review tools, e.g., data\oos_gt_main.csv.sqlite")
+    ap.add_argument("--out_csv", default="", help="CSV to write (filename,x1,y1,x2,y2)")
+    ap.add_argument("--out_json", default="", help="GT JSON to write (same as csv_to_oos_gt.py output)")
+    ap.add_argument("--images_dir", default="", help="Optional; include all images from this dir as JSON keys")
+    args = ap.parse_args(argv)
+
+    if not os.path.exists(args.store):
+        raise SystemExit(f"[ERROR] store not found: {args.store}")
+    store = AnnotationStore(args.store)
+    if args.out_csv:
+        n = store.export_csv(args.out_csv)
+        print(f"[OK] Wrote {n} rows -> {args.out_csv}")
+    if args.out_json:
+        n = store.export_gt_json(args.out_json, args.images_dir)
+        print(f"[OK] Wrote GT JSON for {n} images -> {args.out_json}")
+    store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+import os, json, math, time, random, socket, argparse, platform
+from . import profiling
+
+# the profile `oos infer` / `oos cascade` read for settings not given on the command line
+PROFILE_ENV = "OOS_INFER_PROFILE"
+TUNED_KEYS = ("imgsz", "batch", "threads", "workers")
+SPEED_KEYS = ("batch", "threads", "workers")  # don't change detections, so safe to share across weights
+
+def profile_path():
+    return os.environ.get(PROFILE_ENV) or os.path.join(os.path.expanduser("~"), ".config", "oos", "infer_profile.json")
+
+def machine_fingerprint():
+    """Hardware + torch identity, to notice a profile tuned on different hardware.
+
+    No hostname: containers and CI runners get a new one every run.
+    """
+    fp = {"machine": platform.machine(), "processor": platform.processor(), "cpu_count": os.cpu_count() or 1,
+          "torch": None, "gpus": []}
+    try:
+        import torch  # inference imports it anyway; only reached when a profile is read or written
+    except ImportError:
+        return fp
+    fp["torch"] = torch.__version__
+    if torch.cuda.is_available():
+        fp["gpus"] = [torch.cuda.get_device_name(i) for i in range(torch.cuda.device_count())]
+        fp["cuda"] = torch.version.cuda
+        get_driver = getattr(torch._C, "_cuda_getDriverVersion", None)
+        fp["cuda_driver"] = get_driver() if get_driver else None
+    return fp
+
+def read_profile(path=None):
+    path = path or profile_path()
+    if not os.path.isfile(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def load_profile(weights, device=None, path=None):
+    """Tuned settings for these weights on this machine and device; {} if none applies.
+
+    The shared default (tuned on other weights) only supplies the speed knobs: imgsz changes detections.
+    """
+    path = path or profile_path()
+    try:
+        prof = read_profile(path)
+    except (OSError, ValueError) as e:
+        print(f"[WARN] ignoring unreadable inference profile {path}: {e}")
+        return {}
+    if not prof:
+        return {}
+    if prof.get("machine") != machine_fingerprint():
+        print(f"[WARN] inference profile {path} was tuned on different hardware / torch; ignoring it (re-run `oos autotune`)")
+        return {}
+    entry, keys = prof.get("weights", {}).get(os.path.basename(weights)), TUNED_KEYS
+    if not entry:
+        entry, keys = prof.get("default"), SPEED_KEYS
+    if not entry:
+        return {}
+    if entry.get("device") != device:
+        print(f"[WARN] inference profile {path} was tuned for device {entry.get('device') or 'auto'}, "
+              f"not {device or 'auto'}; ignoring it")
+        return {}
+    return {k: entry[k] for k in keys if k in entry}
+
+def resolve_settings(args, tuned, defaults):
+    """Explicit args win, then the tuned profile, then the built-in defaults."""
+    s, used = {}, []
+    for k, d in defaults.items():
+        v = getattr(args, k, None)
+        if v is None and k in tuned:
+            v = tuned[k]; used.append(f"{k}={v}")
+        s[k] = d if v is None else v
+    if used:
+        print(f"[OK] tuned settings from {profile_path()}: {', '.join(used)}")
+    return s
+
+def save_profile(weights, best, path=None, make_default=True):
+    path = path or profile_path()
+    try:
+        prof = read_profile(path)
+    except (OSError, ValueError):
+        prof = {}
+    if prof.get("machine") != machine_fingerprint():
+        prof = {}  # entries tuned elsewhere say nothing about this box
+    prof["machine"] = machine_fingerprint()
+    prof["host"] = socket.gethostname()  # label only; not part of the match
+    prof.setdefault("weights", {})[os.path.basename(weights)] = best
+    if make_default:
+        prof["default"] = best
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(prof, f, indent=2)
+    return path
+
+def parse_ints(s):
+    return [int(x) for x in s.split(",") if x.strip()]
+
+def default_threads():
+    n = os.cpu_count() or 1
+    return sorted({1 << i for i in range(n.bit_length()) if 1 << i <= n} | {n})
+
+def grid(imgszs, batches, threads, workers, ncpu):
+    """All combinations that don't oversubscribe the cores (threads * workers <= ncpu)."""
+    out = []
+    for sz in imgszs:
+        for b in batches:
+            for w in workers:
+                for t in threads:
+                    if t * w <= ncpu:
+                        out.append({"imgsz": sz, "batch": b, "threads": t, "workers": w})
+    return out
+
+def p95(xs):
+    s = sorted(xs)
+    return s[max(0, math.ceil(0.95 * len(s)) - 1)] if s else 0.0
+
+def sample_images(paths, n, seed=0):
+    if n <= 0 or n >= len(paths):
+        return list(paths)
+    return sorted(random.Random(seed).sample(list(paths), n))
+
+def agreement(det, ref, iou_thr=0.5):
+    """Mean per-image F1 of det vs ref boxes (greedy one-to-one at iou_thr); 1.0 when both are empty."""
+    from .oos_eval_bootstrap import iou
+    scores = []
+    for fn, r in ref.items():
+        d = det.get(fn, [])
+        if not r and not d:
+            scores.append(1.0); continue
+        used, tp = set(), 0
+        for b in d:
+            best, bi = iou_thr, -1
+            for j, g in enumerate(r):
+                if j not in used:
+                    v = iou(b, g)
+                    if v >= best:
+                        best, bi = v, j
+            if bi >= 0:
+                used.add(bi); tp += 1
+        scores.append(2.0 * tp / (len(d) + len(r)))
+    return sum(scores) / len(scores) if scores else 1.0
+
+def forward_calls(model, paths, imgsz, device, batch):
+    """Forward passes the network makes for one chunk of `batch` images (1 if batching works); None if not hookable."""
+    from .infer_yolo import predict_paths
+    net = getattr(model, "model", None)
+    if not hasattr(net, "register_forward_pre_hook"):
+        return None  # exported (non-torch) weights
+    calls = [0]
+    h = net.register_forward_pre_hook(lambda *a: calls.__setitem__(0, calls[0] + 1))
+    try:
+        predict_paths(model, paths[:batch], imgsz, device=device, batch=batch)
+    finally:
+        h.remove()
+    return calls[0]
+
+def _bench_job(job):
+    """One worker: load, warm up, wait for the others, then time the sample slice."""
+    from .infer_yolo import load_model, predict_paths
+    weights, paths, cfg, conf, iou, device, warmup, barrier = job
+    model = load_model(weights, cfg["threads"])
+    predict_paths(model, paths[:max(1, cfg["batch"]) * warmup], cfg["imgsz"], conf, iou, device, cfg["batch"])
+    calls = forward_calls(model, paths, cfg["imgsz"], device, cfg["batch"]) if 1 < cfg["batch"] <= len(paths) else None
+    if barrier is not None:
+        barrier.wait()
+    lat = []
+    t0 = time.perf_counter()
+    res = predict_paths(model, paths, cfg["imgsz"], conf, iou, device, cfg["batch"], latencies=lat)
+    return res, lat, t0, time.perf_counter(), calls
+
+def bench(weights, paths, cfg, conf=0.25, iou=0.45, device=None, warmup=2):
+    """Run one config in fresh processes (threads are process-wide).
+
+    Returns (detections, images/s, p95 ms, forward passes per batch or None).
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    w = max(1, min(cfg["workers"], len(paths)))
+    with multiprocessing.Manager() as mgr, ProcessPoolExecutor(max_workers=w) as ex:
+        barrier = mgr.Barrier(w) if w > 1 else None
+        jobs = [(weights, paths[i::w], cfg, conf, iou, device, warmup, barrier) for i in range(w)]
+        parts = list(ex.map(_bench_job, jobs))
+    det = {name: boxes for p in parts for name, _, _, boxes in p[0]}
+    lat = [x for p in parts for x in p[1]]
+    wall = max(p[3] for p in parts) - min(p[2] for p in parts)
+    calls = max((p[4] for p in parts if p[4] is not None), default=None)
+    return det, len(paths) / max(wall, 1e-9), 1000.0 * p95(lat), calls
+
+def fmt_cfg(c):
+    return f"imgsz={c['imgsz']:<5d} batch={c['batch']:<3d} threads={c['threads']:<3d} workers={c['workers']:<2d}"
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark inference settings on this machine and save the fastest one that still agrees with the reference.")
+    ap.add_argument("--weights", required=True)
+    ap.add_argument("--images_dir", required=True, help="Images directory or image pack to sample from")
+    ap.add_argument("--manifest", default="", help="Subset manifest; --images_dir is then the subset root")
+    ap.add_argument("--split", default="test", help="Split to read from --manifest")
+    ap.add_argument("--sample", type=int, default=32, help="Images to benchmark on (0=all)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--imgsz", default="480,640,800", help="Comma-separated sizes to try")
+    ap.add_argument("--batch", default="1,2,4,8", help="Comma-separated batch sizes to try")
+    ap.add_argument("--threads", default="", help="Comma-separated intra-op thread counts (default: powers of two up to the core count)")
+    ap.add_argument("--workers", default="1,2", help="Comma-separated inference process counts")
+    ap.add_argument("--ref_imgsz", type=int, default=640, help="Reference setting (batch 1, torch default threads, 1 worker)")
+    ap.add_argument("--min_agreement", type=float, default=0.95, help="Min mean per-image box F1 vs the reference (IoU>=0.5)")
+    ap.add_argument("--max_p95_ms", type=float, default=0, help="Optional p95 per-image latency ceiling (0=none)")
+    ap.add_argument("--warmup", type=int, default=2, help="Warm-up batches per worker before timing")
+    ap.add_argument("--conf", type=float, default=0.25)
+    ap.add_argument("--iou", type=float, default=0.45)
+    ap.add_argument("--device", default=None, help="cuda:0 or cpu")
+    ap.add_argument("--profile_out", default="", help=f"Profile file (default: ${PROFILE_ENV} or ~/.config/oos/infer_profile.json)")
+    ap.add_argument("--no_default", action="store_true", help="Only save for these weights, not as the default for others")
+    ap.add_argument("--report_json", default="", help="All measured configs")
+    ap.add_argument("--dry_run", action="store_true", help="Measure and report, but don't write the profile")
+    profiling.add_profile_args(ap)
+    args = ap.parse_args(argv)
+    profiling.start("autotune", args)
+
+    from . import image_pack
+    from .subset_qc_tools import load_manifest, split_images
+    if args.manifest:
+        paths = split_images(args.images_dir, args.split, load_manifest(args.manifest))
+    else:
+        paths = image_pack.list_images(args.images_dir)
+    paths = sample_images(paths, args.sample, args.seed)
+    if not paths:
+        raise SystemExit(f"[ERROR] no images found: {args.images_dir}")
+    ncpu = os.cpu_count() or 1
+    configs = grid(parse_ints(args.imgsz), parse_ints(args.batch),
+                   parse_ints(args.threads) if args.threads else default_threads(), parse_ints(args.workers), ncpu)
+    print(f"[OK] {len(configs)} configs on {len(paths)} images ({ncpu} cores)")
+
+    ref_cfg = {"imgsz": args.ref_imgsz, "batch": 1, "threads": 0, "workers": 1}
+    with profiling.stage("reference"):
+        ref, ref_ips, ref_p95, _ = bench(args.weights, paths, ref_cfg, args.conf, args.iou, args.device, args.warmup)
+    print(f"[REF] {fmt_cfg(ref_cfg)}  {ref_ips:7.2f} img/s  p95 {ref_p95:8.1f} ms")
+
+    rows = []
+    for cfg in configs:
+        with profiling.stage("bench"):
+            det, ips, lat95, calls = bench(args.weights, paths, cfg, args.conf, args.iou, args.device, args.warmup)
+        agr = agreement(det, ref)
+        ok = agr >= args.min_agreement and (args.max_p95_ms <= 0 or lat95 <= args.max_p95_ms)
+        if calls is not None and calls != 1:
+            # not really batched: the timing would only measure noise
+            print(f"  [WARN] batch={cfg['batch']} made {calls} forward passes per batch; rejecting")
+            ok = False
+        rows.append(dict(cfg, images_per_s=ips, p95_ms=lat95, agreement=agr, forward_calls=calls, ok=ok))
+        profiling.count("configs")
+        print(f"  {fmt_cfg(cfg)}  {ips:7.2f} img/s  p95 {lat95:8.1f} ms  agree {agr:.3f}{'' if ok else '  [rejected]'}")
+
+    if args.report_json:
+        os.makedirs(os.path.dirname(args.report_json) or ".", exist_ok=True)
+        with open(args.report_json, "w", encoding="utf-8") as f:
+            json.dump({"reference": dict(ref_cfg, images_per_s=ref_ips, p95_ms=ref_p95), "configs": rows,
+                       "sample": len(paths), "machine": machine_fingerprint()}, f, indent=2)
+        print(f"[OK] report -> {args.report_json}")
+    passing = [r for r in rows if r["ok"]]
+    if not passing:
+        print("[WARN] no config met the agreement / latency gates; profile not written")
+        profiling.finish()
+        return
+    best = max(passing, key=lambda r: r["images_per_s"])
+    print(f"[BEST] {fmt_cfg(best)}  {best['images_per_s']:.2f} img/s (x{best['images_per_s'] / max(ref_ips, 1e-9):.2f} vs reference)")
+    if not args.dry_run:
+        entry = {k: best[k] for k in TUNED_KEYS}
+        entry.update(images_per_s=round(best["images_per_s"], 3), p95_ms=round(best["p95_ms"], 1),
+                     agreement=round(best["agreement"], 4), device=args.device, sample=len(paths),
+                     tuned_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+        path = save_profile(args.weights, entry, args.profile_out or None, not args.no_default)
+        print(f"[OK] saved profile -> {path} (used by `oos infer` / `oos cascade` unless overridden)")
+    profiling.finish()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import os, re, argparse, random
+from .subset_qc_tools import parse_bins, which_bin, write_manifest
+from .remap_subset_split import ensure, place_file
+
+SPLITS = ("train", "val", "test")
+IMG_EXTS = (".jpg", ".jpeg", ".png", ".JPG", ".PNG")
+
+BLANK_LINE = re.compile(rb"(?m)^[ \t\r\f\v]*$")
+
+def count_boxes_fast(txt_path: str) -> int:
+    # one box per line; count newlines on raw bytes and only fall back to a
+    # per-line scan when some line is empty or whitespace-only
+    with open(txt_path, "rb") as f:
+        data = f.read()
+    if not data.strip():
+        return 0
+    body = data[:-1] if data.endswith(b"\n") else data
+    if BLANK_LINE.search(body):
+        return sum(1 for ln in data.splitlines() if ln.strip())
+    return data.count(b"\n") + (0 if data.endswith(b"\n") else 1)
+
+def iter_labels(labels_dir):
+    # scandir streams entries instead of materialising the whole listing
+    with os.scandir(labels_dir) as it:
+        for e in it:
+            if e.name.endswith(".txt") and e.is_file():
+                yield e.path
+
+def reservoir_by_bin(label_paths, bins, k, seed=123, keep=None):
+    """One pass over label_paths keeping a uniform sample of at most k files per density bin.
+
+    Labels failing keep(path) are skipped before sampling so they never take a slot.
+    """
+    rng = random.Random(seed)
+    res = [[] for _ in bins]
+    seen = [0] * len(bins)
+    for p in label_paths:
+        if keep is not None and not keep(p):
+            continue
+        b = which_bin(count_boxes_fast(p), bins)
+        if b is None:
+            continue
+        seen[b] += 1
+        if len(res[b]) < k:
+            res[b].append(p)
+        else:
+            j = rng.randrange(seen[b])
+            if j < k:
+                res[b][j] = p
+    return res, seen
+
+def find_image(images_dir, stem):
+    """Image for a label stem (first match in IMG_EXTS order), or None."""
+    for ext in IMG_EXTS:
+        p = os.path.join(images_dir, stem + ext)
+        if os.path.isfile(p):
+            return p
+    return None
+
+def build_subset(labels_dir, images_dir, out_root, bins, targets, mode="hardlink", seed=123):
+    """Sample targets=(n_train, n_val, n_test) label files per bin and link them under out_root."""
+    stem_of = lambda p: os.path.splitext(os.path.basename(p))[0]
+    # probe per label instead of indexing the image dir, so memory stays O(sample) not O(N)
+    n_missing, first_missing = 0, None
+    def has_image(p):
+        nonlocal n_missing, first_missing
+        if find_image(images_dir, stem_of(p)) is not None:
+            return True
+        n_missing += 1
+        first_missing = first_missing or p
+        return False
+    res, seen = reservoir_by_bin(iter_labels(labels_dir), bins, sum(targets), seed=seed, keep=has_image)
+    if n_missing:
+        print(f"  [WARN] {n_missing} label files have no image in {images_dir} (skipped), e.g. {first_missing}")
+    rng = random.Random(seed + 1)
+    man = {s: [] for s in SPLITS}
+    per_bin = []
+    for b, picked in enumerate(res):
+        picked = sorted(picked)
+        rng.shuffle(picked)
+        counts = {s: 0 for s in SPLITS}
+        start = 0
+        for split, n in zip(SPLITS, targets):
+            for lbl in picked[start:start + n]:
+                stem = stem_of(lbl)
+                img = find_image(images_dir, stem)
+                img_dst = os.path.join(out_root, "images", split)
+                lbl_dst = os.path.join(out_root, "labels", split)
+                ensure(img_dst); ensure(lbl_dst)
+                place_file(img, os.path.join(img_dst, os.path.basename(img)), mode)
+                place_file(lbl, os.path.join(lbl_dst, stem + ".txt"), mode)
+                man[split].append(os.path.basename(img))
+                counts[split] += 1
+            start += n
+        per_bin.append({"seen": seen[b], **counts})
+    for split in SPLITS:
+        man[split].sort()
+    return man, per_bin
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build a density-stratified train/val/test subset in one pass (reservoir sampling per bin).")
+    ap.add_argument("--labels_dir", required=True, help="Source YOLO labels dir (one .txt per image)")
+    ap.add_argument("--images_dir", required=True, help="Source images dir matching --labels_dir")
+    ap.add_argument("--out_root", required=True, help=r"Subset root to create (e.g., data\sku110k_subset_strat)")
+    ap.add_argument("--bins", default="0-10,11-30,31-80,81-150,151-9999", help="Density bins for YOLO box counts")
+    ap.add_argument("--targets", default="100,20,20", help="Per-bin train,val,test counts")
+    ap.add_argument("--mode", choices=("hardlink", "symlink", "copy"), default="hardlink", help="How files are placed in the subset")
+    ap.add_argument("--seed", type=int, default=123)
+    ap.add_argument("--manifest_out", default="", help="Manifest path (default: <out_root>/subset_manifest.json)")
+    args = ap.parse_args(argv)
+
+    bins = parse_bins(args.bins)
+    targets = tuple(int(t) for t in args.targets.split(","))
+    if len(targets) != len(SPLITS):
+        raise SystemExit("[ERROR] --targets needs three comma-separated counts: train,val,test")
+
+    man, per_bin = build_subset(args.labels_dir, args.images_dir, args.out_root, bins, targets, args.mode, args.seed)
+    mp = write_manifest(man, args.manifest_out or os.path.join(args.out_root, "subset_manifest.json"))
+
+    for i, ((a, b), info) in enumerate(zip(bins, per_bin)):
+        print(f"  bin {i} [{a}-{b}]: seen={info['seen']} train={info['train']} val={info['val']} test={info['test']}")
+    print(f"[OK] {sum(len(v) for v in man.values())} images placed under {args.out_root} ({args.mode})")
+    print("[OK] Wrote manifest to", mp)
+
+if __name__ == "__main__":
+    main()
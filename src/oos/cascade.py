@@ -0,0 +1,192 @@
+import os, json, time, argparse
+from . import profiling, image_pack
+from .subset_qc_tools import load_manifest, split_images
+from .raw_cache import clamp_boxes
+from .oos_row_gap import group_rows, gaps_in_row
+from .oos_eval_bootstrap import precision_recall
+from .autotune import load_profile, resolve_settings
+
+def list_images(images_dir, manifest=None, split="test"):
+    if manifest is not None:
+        return split_images(images_dir, split, manifest)
+    return image_pack.list_images(images_dir)
+
+def predict_boxes(model, source, imgsz, conf, iou, device):
+    res = model.predict(source, imgsz=imgsz, conf=conf, iou=iou, device=device, verbose=False)[0]
+    if not res or res.boxes is None:
+        return []
+    return res.boxes.xyxy.cpu().numpy().tolist()
+
+def predict_image(model, ref, imgsz, conf, iou, device):
+    """Boxes in original pixel coords for a file or image-pack ref."""
+    src = image_pack.predict_source(ref)
+    boxes = predict_boxes(model, src, imgsz, conf, iou, device)
+    return boxes if isinstance(src, str) else image_pack.to_original(boxes, ref, src.shape)
+
+def find_gaps(boxes, row_tol_px=30, gap_factor=1.4, min_abs_gap=10):
+    """Same row grouping + gap scan as `oos gaps`; returns (gap boxes, [(row boxes, row gaps)])."""
+    rows, gaps = [], []
+    for r in group_rows(boxes, row_tol_px=row_tol_px):
+        row_boxes = [boxes[i] for i in r["idxs"]]
+        g = gaps_in_row(row_boxes, gap_factor=gap_factor, min_abs_gap=min_abs_gap)
+        rows.append((row_boxes, g)); gaps += g
+    return gaps, rows
+
+def candidate_bands(rows, H, pad_frac=0.25):
+    """Vertical bands [y1, y2] around rows with candidate gaps (padded, overlapping bands merged)."""
+    bands = []
+    for row_boxes, g in rows:
+        if not g:
+            continue
+        y1 = min(b[1] for b in row_boxes); y2 = max(b[3] for b in row_boxes)
+        pad = (y2 - y1) * pad_frac
+        bands.append([max(0, y1 - pad), min(H, y2 + pad)])
+    bands.sort()
+    merged = []
+    for b in bands:
+        if merged and b[0] <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], b[1])
+        else:
+            merged.append(b)
+    return merged
+
+def in_band(box, band):
+    cy = (box[1] + box[3]) / 2.0
+    return band[0] <= cy <= band[1]
+
+def run_cascade(model, paths, coarse_imgsz=320, fine_imgsz=1280, conf=0.25, iou=0.45, device=None,
+                scope="image", row_tol_px=30, coarse_gap_factor=1.0, coarse_min_abs_gap=5):
+    """Coarse pass on every image, fine pass only where the coarse boxes suggest a gap.
+
+    Returns (detections, stats). Images without candidates keep their coarse boxes.
+    """
+    out = {}
+    stats = {"images": len(paths), "coarse_images": 0, "candidate_images": 0, "empty_coarse": 0,
+             "fine_images": 0, "fine_rows": 0}
+    for p in paths:
+        name = os.path.basename(p)
+        with profiling.stage("image_size"):
+            W, H = image_pack.image_size(p)
+        with profiling.stage("coarse_predict"):
+            coarse = clamp_boxes(predict_image(model, p, coarse_imgsz, conf, iou, device), W, H)
+        stats["coarse_images"] += 1
+        with profiling.stage("coarse_gaps"):
+            cand, rows = find_gaps(coarse, row_tol_px, coarse_gap_factor, coarse_min_abs_gap)
+        if coarse and not cand:
+            out[name] = coarse
+            continue
+        # nothing at low res may be an empty shelf rather than a full one: refine the whole image
+        stats["candidate_images"] += 1
+        stats["empty_coarse"] += int(not coarse)
+        if scope == "rows" and coarse:
+            bands = candidate_bands(rows, H)
+            boxes = [b for b in coarse if not any(in_band(b, band) for band in bands)]
+            with image_pack.open_pil(p) as im:
+                im = im.convert("RGB")
+                k = im.size[0] / float(W)  # < 1 for pre-resized pack entries
+                for band in bands:
+                    y1, y2 = int(band[0] * k), int(round(band[1] * k))
+                    with profiling.stage("fine_predict"):
+                        fine = predict_boxes(model, im.crop((0, y1, im.size[0], y2)), fine_imgsz, conf, iou, device)
+                    shifted = clamp_boxes([[b[0] / k, (b[1] + y1) / k, b[2] / k, (b[3] + y1) / k] for b in fine], W, H)
+                    boxes += [b for b in shifted if in_band(b, band)]
+                    stats["fine_rows"] += 1
+            out[name] = boxes
+        else:
+            with profiling.stage("fine_predict"):
+                out[name] = clamp_boxes(predict_image(model, p, fine_imgsz, conf, iou, device), W, H)
+            stats["fine_images"] += 1
+    return out, stats
+
+def run_full(model, paths, fine_imgsz, conf, iou, device):
+    out = {}
+    for p in paths:
+        W, H = image_pack.image_size(p)
+        with profiling.stage("full_predict"):
+            out[os.path.basename(p)] = clamp_boxes(predict_image(model, p, fine_imgsz, conf, iou, device), W, H)
+    return out
+
+def gaps_of(det, row_tol_px, gap_factor, min_abs_gap):
+    return {fn: find_gaps(boxes, row_tol_px, gap_factor, min_abs_gap)[0] for fn, boxes in det.items()}
+
+def write_json(obj, path, indent=None):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=indent)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Coarse-to-fine YOLO inference: low-res pass everywhere, high-res only where gaps are likely.")
+    ap.add_argument("--weights", required=True)
+    ap.add_argument("--images_dir", required=True)
+    ap.add_argument("--out_json", required=True, help="Detections JSON (same format as `oos infer`)")
+    ap.add_argument("--coarse_imgsz", type=int, default=320)
+    ap.add_argument("--fine_imgsz", type=int, default=1280)
+    ap.add_argument("--conf", type=float, default=0.25)
+    ap.add_argument("--iou", type=float, default=0.45)
+    ap.add_argument("--device", default=None, help="cuda:0 or cpu")
+    ap.add_argument("--threads", type=int, default=None, help="Torch intra-op threads, 0 = torch default (default: tuned profile)")
+    ap.add_argument("--no_tuned", action="store_true", help="Ignore the autotune profile")
+    ap.add_argument("--scope", choices=["image", "rows"], default="image",
+                    help="Refine whole candidate images, or only full-width bands around candidate rows")
+    ap.add_argument("--row_tol_px", type=float, default=30, help="Row grouping tolerance (as in `oos gaps`)")
+    ap.add_argument("--coarse_gap_factor", type=float, default=1.0, help="Relaxed gap factor for candidates (gaps uses 1.4)")
+    ap.add_argument("--coarse_min_abs_gap", type=float, default=5, help="Relaxed absolute gap for candidates (gaps uses 10)")
+    ap.add_argument("--gap_factor", type=float, default=1.4, help="Final gap factor, for --compare")
+    ap.add_argument("--min_abs_gap", type=float, default=10, help="Final absolute gap, for --compare")
+    ap.add_argument("--compare", action="store_true", help="Also run high-res on every image and report the gap recall cost")
+    ap.add_argument("--gt_json", default="", help="Optional OOS GT to score both modes against (with --compare)")
+    ap.add_argument("--report_json", default="", help="Stage counts / timings / comparison JSON")
+    ap.add_argument("--manifest", default="", help="Subset manifest; --images_dir is then the subset root")
+    ap.add_argument("--split", default="test", help="Split to read from --manifest")
+    profiling.add_profile_args(ap)
+    args = ap.parse_args(argv)
+    profiling.start("cascade", args)
+
+    # per-image passes at two fixed sizes: only the thread count carries over from `oos autotune`
+    s = resolve_settings(args, {} if args.no_tuned else load_profile(args.weights, args.device), {"threads": 0})
+    with profiling.stage("load_model"):
+        from .infer_yolo import load_model  # heavy (torch) import happens inside
+        model = load_model(args.weights, s["threads"])
+    paths = list_images(args.images_dir, load_manifest(args.manifest) if args.manifest else None, args.split)
+
+    t0 = time.perf_counter()
+    det, stats = run_cascade(model, paths, args.coarse_imgsz, args.fine_imgsz, args.conf, args.iou, args.device,
+                             args.scope, args.row_tol_px, args.coarse_gap_factor, args.coarse_min_abs_gap)
+    stats["cascade_s"] = time.perf_counter() - t0
+    write_json(det, args.out_json)
+    for k in ("images", "candidate_images", "fine_images", "fine_rows"):
+        profiling.count(k, stats[k])
+    skipped = stats["images"] - stats["candidate_images"]
+    print(f"[OK] coarse pass: {stats['coarse_images']} images; candidates: {stats['candidate_images']} "
+          f"({stats['empty_coarse']} with no coarse boxes); fine pass: {stats['fine_images']} images, {stats['fine_rows']} row bands; "
+          f"skipped high-res on {skipped} images")
+    print(f"[OK] wrote detections for {len(det)} images to {args.out_json} in {stats['cascade_s']:.1f}s")
+
+    report = {"stats": stats, "params": {k: v for k, v in vars(args).items() if k not in ("profile", "profile_sampler")}}
+    if args.compare:
+        t0 = time.perf_counter()
+        full = run_full(model, paths, args.fine_imgsz, args.conf, args.iou, args.device)
+        report["full_s"] = time.perf_counter() - t0
+        g_casc = gaps_of(det, args.row_tol_px, args.gap_factor, args.min_abs_gap)
+        g_full = gaps_of(full, args.row_tol_px, args.gap_factor, args.min_abs_gap)
+        # recall cost: how many always-high-res gaps the cascade still finds
+        prec, rec, tp, fp, fn = precision_recall(g_casc, g_full, 0.3)
+        report["vs_full"] = {"gap_recall": rec, "gap_precision": prec, "tp": tp, "fp": fp, "fn": fn,
+                             "speedup": report["full_s"] / max(stats["cascade_s"], 1e-9)}
+        print(f"[CMP] vs always high-res: gap recall {rec:.3f} precision {prec:.3f} (missed {fn} of {tp+fn}); "
+              f"time {stats['cascade_s']:.1f}s vs {report['full_s']:.1f}s (x{report['vs_full']['speedup']:.2f})")
+        if args.gt_json:
+            with open(args.gt_json, "r", encoding="utf-8") as f:
+                gt = json.load(f)
+            gt = {k: v for k, v in gt.items() if k in det}
+            for mode, g in (("cascade", g_casc), ("full", g_full)):
+                p, r, *_ = precision_recall(g, gt, 0.3)
+                report[f"gt_{mode}"] = {"precision": p, "recall": r}
+                print(f"[CMP] {mode:<8s} vs GT: precision {p:.3f} recall {r:.3f}")
+    if args.report_json:
+        write_json(report, args.report_json, indent=2)
+        print(f"[OK] report -> {args.report_json}")
+    profiling.finish()
+
+if __name__ == "__main__":
+    main()
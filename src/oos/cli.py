@@ -0,0 +1,56 @@
+import sys, importlib
+
+# subcommand -> (module, one-line help). Modules are imported only when their
+# subcommand runs, so `oos --help` and light subcommands never load cv2/torch.
+COMMANDS = {
+    "coco2yolo":    ("convert_to_yolo",            "Convert COCO JSON to YOLO labels"),
+    "csv2yolo":     ("csv_to_yolo_sku110k_v2",     "Convert SKU-110K style CSV to YOLO labels"),
+    "csv2gt":       ("csv_to_oos_gt",              "Convert OOS CSV (or annotation store) to GT JSON"),
+    "infer":        ("infer_yolo",                 "Run YOLO inference on images"),
+    "cascade":      ("cascade",                    "Coarse-to-fine inference: high-res only where gaps are likely"),
+    "autotune":     ("autotune",                   "Benchmark imgsz/batch/threads/workers; save the per-machine infer profile"),
+    "gaps":         ("oos_row_gap",                "Detect OOS gaps from detections and visualize"),
+    "eval":         ("oos_eval_bootstrap",         "Precision/recall with bootstrap CIs"),
+    "review":       ("oos_label_from_predictions", "Keyboard-only prediction reviewer (no GUI)"),
+    "annotate":     ("quick_box_annotator_lite",   "Interactive box annotator"),
+    "highlight":    ("full_image_highlighter",     "Full-image box reviewer"),
+    "atlas":        ("gap_atlas",                  "Gap crop atlases + grid-mode batch reviewer"),
+    "pack":         ("image_pack",                 "Build/inspect memory-mapped image packs (use as --images_dir)"),
+    "store":        ("annotation_store",           "Export the annotation store to CSV / GT JSON"),
+    "qc":           ("subset_qc_tools",            "Subset QC: bin coverage, parity, manifest"),
+    "remap":        ("remap_subset_split",         "Remap subset splits (copy/link/virtual)"),
+    "build-subset": ("build_stratified_subset",    "One-pass stratified subset builder"),
+    "phash":        ("phash_leakage",              "Near-duplicate / cross-split leakage check"),
+    "pipeline":     ("pipeline",                   "Run a cached DAG of commands from a JSON config"),
+    "repost":       ("raw_cache",                  "Re-apply conf/iou + NMS to a raw prediction cache"),
+    "shard":        ("sharding",                   "Plan balanced shards; merge/reduce per-shard outputs"),
+    "history":      ("history_store",              "OOS history store: ingest runs, persistence/aggregate queries"),
+}
+
+# today's script names keep working as subcommands too (e.g. `oos oos_row_gap`)
+ALIASES = {mod: cmd for cmd, (mod, _) in COMMANDS.items()}
+
+def usage():
+    lines = ["usage: oos <command> [options]", "", "commands:"]
+    for cmd, (mod, text) in COMMANDS.items():
+        lines.append(f"  {cmd:<13s} {text}  [{mod}.py]")
+    lines += ["", "Run `oos <command> --help` for the options of a command."]
+    return "\n".join(lines)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help", "help"):
+        print(usage())
+        return 0
+    cmd, rest = argv[0], argv[1:]
+    cmd = ALIASES.get(cmd, cmd)
+    if cmd not in COMMANDS:
+        print(f"oos: unknown command {argv[0]!r}\n", file=sys.stderr)
+        print(usage(), file=sys.stderr)
+        return 2
+    mod = importlib.import_module(f"{__package__}.{COMMANDS[cmd][0]}")
+    sys.argv = [f"oos {cmd}"] + rest  # argparse uses argv[0] as prog in usage lines
+    return mod.main(rest) or 0
+
+if __name__ == "__main__":
+    sys.exit(main())
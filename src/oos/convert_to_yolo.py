@@ -1,9 +1,11 @@
 import json, argparse, os, pathlib
+from . import profiling
 
 def coco_to_yolo(coco_json, images_dir, out_dir):
     os.makedirs(out_dir, exist_ok=True)
-    with open(coco_json, "r", encoding="utf-8") as f:
-        coco = json.load(f)
+    with profiling.stage("read_json"):
+        with open(coco_json, "r", encoding="utf-8") as f:
+            coco = json.load(f)
 
     img_map = {img["id"]: img["file_name"] for img in coco["images"]}
     size_map = {img["id"]: (img["width"], img["height"]) for img in coco["images"]}
@@ -27,14 +29,22 @@ def coco_to_yolo(coco_json, images_dir, out_dir):
             labels.append(f"0 {xc:.6f} {yc:.6f} {nw:.6f} {nh:.6f}")
         if labels:
             out_path = os.path.join(out_dir, f"{stem}.txt")
-            with open(out_path, "w", encoding="utf-8") as f:
-                f.write("\n".join(labels))
+            with profiling.stage("write_label"):
+                with open(out_path, "w", encoding="utf-8") as f:
+                    f.write("\n".join(labels))
+            profiling.count("label_files"); profiling.count("boxes", len(labels))
 
-if __name__ == "__main__":
+def main(argv=None):
     ap = argparse.ArgumentParser()
     ap.add_argument("--coco_json", required=True)
     ap.add_argument("--images_dir", required=True)
     ap.add_argument("--out_dir", required=True)
-    args = ap.parse_args()
+    profiling.add_profile_args(ap)
+    args = ap.parse_args(argv)
+    profiling.start("convert_to_yolo", args)
     coco_to_yolo(args.coco_json, args.images_dir, args.out_dir)
     print("[OK] YOLO labels written to", args.out_dir)
+    profiling.finish()
+
+if __name__ == "__main__":
+    main()
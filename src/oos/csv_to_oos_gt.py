@@ -0,0 +1,63 @@
+import os, csv, json, argparse
+from . import profiling, image_pack
+
+def read_csv_boxes(csv_path):
+    gt = {}
+    # read CSV rows
+    with open(csv_path, "r", encoding="utf-8") as f:
+        rdr = csv.reader(f)
+        for row in rdr:
+            if not row or len(row) < 5:
+                continue
+            fn = row[0].strip()
+            try:
+                x1, y1, x2, y2 = map(float, row[1:5])
+            except Exception:
+                # skip malformed numeric fields
+                continue
+            gt.setdefault(fn, []).append([x1, y1, x2, y2])
+    return gt
+
+def add_image_keys(gt, images_dir):
+    # ensure all images appear (even if no boxes)
+    # images_dir may also be an image pack
+    for p in image_pack.list_images(images_dir):
+        fn = os.path.basename(p)
+        gt.setdefault(fn, [])
+    return gt
+
+def write_gt(gt, out_json):
+    os.makedirs(os.path.dirname(out_json) or ".", exist_ok=True)
+    with open(out_json, "w", encoding="utf-8") as f:
+        json.dump(gt, f, indent=2)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Convert a simple CSV of OOS boxes to GT JSON.")
+    ap.add_argument("--csv_path", required=True, help="CSV with rows: filename,x1,y1,x2,y2 (or an annotation store .sqlite)")
+    ap.add_argument("--out_json", required=True, help="Output JSON path, e.g., data\\oos_gt_main.json")
+    ap.add_argument("--images_dir", default="", help="Optional; include all images from this dir as keys (empty list if no boxes)")
+    profiling.add_profile_args(ap)
+    args = ap.parse_args(argv)
+    profiling.start("csv_to_oos_gt", args)
+
+    with profiling.stage("read"):
+        if args.csv_path.endswith(".sqlite"):
+            from .annotation_store import AnnotationStore
+            store = AnnotationStore(args.csv_path)
+            gt = store.all_boxes()
+            store.close()
+        else:
+            gt = read_csv_boxes(args.csv_path)
+
+    if args.images_dir:
+        with profiling.stage("list_images"):
+            add_image_keys(gt, args.images_dir)
+
+    with profiling.stage("write_json"):
+        write_gt(gt, args.out_json)
+    profiling.count("images", len(gt)); profiling.count("boxes", sum(len(v) for v in gt.values()))
+    print(f"[OK] Wrote GT JSON for {len(gt)} images -> {args.out_json}")
+    profiling.finish()
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 
 import os, csv, argparse, glob
-from PIL import Image
+from . import profiling
+from ._lazy import lazy_import
+
+Image = lazy_import("PIL.Image")
 
 # Heuristic header mapping for common CSV schemas
 HEADER_ALIASES = {
@@ -62,7 +65,7 @@ def load_image_size(images_root, rel_path):
                 if os.path.exists(p):
                     c = p; break
         if os.path.exists(c):
-            with Image.open(c) as im:
+            with profiling.stage("image_size"), Image.open(c) as im:
                 return im.size  # (W,H)
     return None
 
@@ -110,7 +113,8 @@ def convert_csv(csv_path, images_root, out_dir):
     grouped = {}
     with open(csv_path, "r", newline="", encoding="utf-8") as f:
         rdr = csv.reader(f)
-        rows = list(rdr)
+        with profiling.stage("read_csv"):
+            rows = list(rdr)
         if not rows:
             raise SystemExit("[ERROR] CSV is empty")
         first = rows[0]
@@ -134,6 +138,7 @@ def convert_csv(csv_path, images_root, out_dir):
                 img_name, yolo, _ = row_to_yolo_from_mapped(row, mapping, images_root)
             if img_name is None:
                 continue
+            profiling.count("rows")
             grouped.setdefault(os.path.basename(img_name), [])
             if yolo is not None:
                 grouped[os.path.basename(img_name)].append(yolo)
@@ -150,16 +155,24 @@ def convert_csv(csv_path, images_root, out_dir):
         lines = []
         for (cls, cx, cy, nw, nh) in grouped.get(img_base, []):
             lines.append(f"{cls} {cx:.6f} {cy:.6f} {nw:.6f} {nh:.6f}")
-        with open(outp, "w", encoding="utf-8") as w:
-            w.write("\n".join(lines))
+        with profiling.stage("write_label"):
+            with open(outp, "w", encoding="utf-8") as w:
+                w.write("\n".join(lines))
         written += 1
+    profiling.count("label_files", written)
     print(f"[OK] Wrote {written} label files to {out_dir}")
 
-if __name__ == "__main__":
+def main(argv=None):
     import argparse
     ap = argparse.ArgumentParser(description="Convert SKU-110K CSV (header or headerless) to YOLO labels.")
     ap.add_argument("--csv_path", required=True, help="Path to annotations_*.csv")
     ap.add_argument("--images_dir", required=True, help="Path to images/<split>")
     ap.add_argument("--out_dir", required=True, help="Output labels/<split>")
-    args = ap.parse_args()
+    profiling.add_profile_args(ap)
+    args = ap.parse_args(argv)
+    profiling.start("csv_to_yolo_sku110k_v2", args)
     convert_csv(args.csv_path, args.images_dir, args.out_dir)
+    profiling.finish()
+
+if __name__ == "__main__":
+    main()
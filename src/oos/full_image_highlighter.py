@@ -0,0 +1,168 @@
+
+import argparse, json, os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from . import image_pack
+from ._lazy import lazy_import
+from .annotation_store import AnnotationStore, default_store_path
+
+cv2 = lazy_import("cv2")
+
+HELP = """
+Full-Image Box Reviewer
+--------------------------------------------
+Shows the FULL image. Current box is thick & bright; other boxes are faint.
+An inset (top-left) shows a zoomed crop of the current box.
+
+Keys:
+  y : accept current box
+  n : reject current box
+  LEFT/RIGHT : previous/next box
+  ENTER/SPACE : next image (saves rows for this image)
+  s : save partial CSV for this image
+  b : save and go BACK one image
+  q/ESC : save and quit
+"""
+
+def read_image(images_dir, fn):
+    # images_dir may also be an image pack (`oos pack build`)
+    path = os.path.join(images_dir, fn)
+    if not image_pack.exists(path):
+        path = os.path.join(images_dir, Path(fn).stem + ".jpg")
+    img = image_pack.imread(path) if image_pack.exists(path) else None
+    if img is not None and not img.flags.writeable:
+        img = img.copy()  # zero-copy pack view
+    if img is not None:
+        W, H = image_pack.image_size(path)
+        if (img.shape[1], img.shape[0]) != (W, H):
+            # pre-resized pack entry: boxes are in original pixels
+            img = cv2.resize(img, (W, H), interpolation=cv2.INTER_LINEAR)
+    return img
+
+def prepare_view(img, boxes, max_side=1600):
+    """Downscale once and bake all boxes into a faint base layer; reused for every keypress."""
+    h, w = img.shape[:2]
+    scale = 1.0
+    if max_side > 0 and max(h, w) > max_side:
+        scale = float(max_side) / float(max(h, w))
+        disp = cv2.resize(img, (int(w*scale), int(h*scale)), interpolation=cv2.INTER_AREA)
+    else:
+        disp = img
+    overlay = disp.copy()
+    for (x1,y1,x2,y2) in boxes:
+        cv2.rectangle(overlay, (int(x1*scale),int(y1*scale)), (int(x2*scale),int(y2*scale)), (0,255,0), 1)
+    # one blend for the whole faint layer instead of one full-image blend per box
+    base = cv2.addWeighted(overlay, 0.3, disp, 0.7, 0)
+    return {"img": img, "base": base, "scale": scale}
+
+def load_view(images_dir, fn, boxes, max_side=1600):
+    img = read_image(images_dir, fn)
+    return None if img is None else prepare_view(img, boxes, max_side)
+
+def draw_full_view(view, boxes, idx):
+    vis = view["base"].copy()
+    s = view["scale"]
+    if boxes:
+        x1,y1,x2,y2 = map(int, boxes[idx])
+        cv2.rectangle(vis, (int(x1*s),int(y1*s)), (int(x2*s),int(y2*s)), (0,0,255), 3)
+        cv2.putText(vis, f"#{idx+1}", (int(x1*s)+4, int(y1*s)-6), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0,0,255), 2, cv2.LINE_AA)
+        # inset crop for current, taken from the full-resolution image
+        img = view["img"]
+        X1, Y1 = max(0, x1-10), max(0, y1-10)
+        X2, Y2 = min(img.shape[1]-1, x2+10), min(img.shape[0]-1, y2+10)
+        crop = img[Y1:Y2, X1:X2]
+        if crop.size:
+            ch, cw = crop.shape[:2]
+            zoom = 250.0 / max(ch, cw)
+            crop = cv2.resize(crop, (max(1, int(cw*zoom)), max(1, int(ch*zoom))), interpolation=cv2.INTER_NEAREST)
+            cv2.rectangle(crop, (int((x1-X1)*zoom), int((y1-Y1)*zoom)), (int((x2-X1)*zoom), int((y2-Y1)*zoom)), (0,0,255), 2)
+            cv2.rectangle(crop, (0,0), (crop.shape[1]-1, crop.shape[0]-1), (0,0,255), 2)
+            ih = min(crop.shape[0], vis.shape[0]-10); iw = min(crop.shape[1], vis.shape[1]-10)
+            vis[10:10+ih, 10:10+iw] = crop[:ih, :iw]
+            cv2.rectangle(vis, (8,8), (12+iw, 12+ih), (0,0,255), 2)
+    return vis
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Review predicted boxes on FULL image with highlight + inset zoom.")
+    ap.add_argument("--pred_json", required=True)
+    ap.add_argument("--images_dir", required=True)
+    ap.add_argument("--out_csv", required=True)
+    ap.add_argument("--store", default="", help="Annotation store (default: <out_csv>.sqlite); CSV is exported from it on quit/done")
+    ap.add_argument("--max_side", type=int, default=1600, help="Display resolution (longest side); 0 = full resolution")
+    args = ap.parse_args(argv)
+
+    with open(args.pred_json, "r", encoding="utf-8") as f:
+        preds = json.load(f)
+    files = sorted(preds.keys())
+    if not files:
+        print("No predictions in", args.pred_json); return
+
+    store = AnnotationStore(args.store or default_store_path(args.out_csv), seed_csv=args.out_csv)
+    cv2.namedWindow("Full-Image Reviewer", cv2.WINDOW_NORMAL)
+    cv2.resizeWindow("Full-Image Reviewer", 1200, 900)
+    print(HELP)
+
+    # decode + downscale + base layer of the next image run on a background thread
+    # (cv2 releases the GIL) while the current one is being reviewed
+    pool = ThreadPoolExecutor(max_workers=1)
+    pending = {}
+    def fetch(i):
+        if 0 <= i < len(files) and i not in pending:
+            pending[i] = pool.submit(load_view, args.images_dir, files[i], preds.get(files[i], []), args.max_side)
+
+    i_img = 0
+    while 0 <= i_img < len(files):
+        fn = files[i_img]
+        fetch(i_img)
+        view = pending.pop(i_img).result()
+        fetch(i_img + 1)
+        if view is None:
+            print("[SKIP] cannot read:", fn)
+            i_img += 1
+            continue
+        boxes = preds.get(fn, [])
+        cur = 0
+        accepted = []
+        while boxes and 0 <= cur < len(boxes):
+            vis = draw_full_view(view, boxes, cur)
+            cv2.putText(vis, f"{fn}  box {cur+1}/{len(boxes)}  (y/n LEFT/RIGHT ENTER s b q)", (20, vis.shape[0]-20),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255,255,255), 2, cv2.LINE_AA)
+            cv2.imshow("Full-Image Reviewer", vis)
+            k = cv2.waitKey(0) & 0xFF
+            if k in (ord('y'), ord('Y')):
+                x1,y1,x2,y2 = map(int, boxes[cur])
+                accepted.append([fn, x1,y1,x2,y2]); cur += 1
+            elif k in (ord('n'), ord('N')):
+                cur += 1
+            elif k == 81:  # LEFT
+                cur = max(0, cur-1)
+            elif k == 83:  # RIGHT
+                cur = min(len(boxes)-1, cur+1)
+            elif k in (13, 32):  # ENTER/SPACE -> next image
+                break
+            elif k in (ord('s'), ord('S')):
+                store.upsert_rows(fn, accepted)
+                print(f"[SAVE] {fn}: rows={len(accepted)}")
+            elif k in (ord('b'), ord('B')):
+                store.upsert_rows(fn, accepted)
+                i_img = max(0, i_img-1)
+                break
+            elif k in (27, ord('q'), ord('Q')):
+                store.upsert_rows(fn, accepted)
+                print(f"[QUIT] {fn}: rows={len(accepted)}")
+                store.export_csv(args.out_csv); store.close()
+                pool.shutdown(wait=False)
+                cv2.destroyAllWindows()
+                return
+        store.upsert_rows(fn, accepted)
+        print(f"[DONE IMG] {fn}: rows={len(accepted)}")
+        i_img += 1
+
+    store.export_csv(args.out_csv); store.close()
+    pool.shutdown(wait=False)
+    cv2.destroyAllWindows()
+    print("[ALL DONE] Convert CSV to JSON next.")
+    print(r"oos csv2gt --csv_path data\oos_gt_main.csv --images_dir data\sku110k_subset_strat\images\test --out_json data\oos_gt_main.json")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+import os, json, argparse
+from concurrent.futures import ProcessPoolExecutor
+from . import profiling, image_pack
+from ._lazy import lazy_import
+from .subset_qc_tools import load_manifest, split_images
+from .annotation_store import AnnotationStore, default_store_path
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+HELP = """
+Gap Atlas Reviewer (grid mode)
+--------------------------------------------
+Every cell is one predicted gap (red box) with some context around it.
+Cells start ACCEPTED (green); click a cell to toggle REJECTED (red).
+Keys:
+  ENTER/SPACE/n : save this page and go to NEXT page
+  p/b           : save and go to PREVIOUS page
+  a             : accept all cells on this page
+  r             : reject all cells on this page
+  q/ESC         : save and QUIT
+  h             : help
+Accepted boxes are added to (rejected ones removed from) the annotation store; the CSV
+(filename,x1,y1,x2,y2) is exported from it on quit/done.
+"""
+
+def crop_window(box, W, H, pad_frac=0.5, min_pad=16):
+    x1, y1, x2, y2 = box[:4]
+    pad = max(min_pad, pad_frac * max(x2 - x1, y2 - y1))
+    return [max(0, int(x1 - pad)), max(0, int(y1 - pad)), min(W, int(x2 + pad + 1)), min(H, int(y2 + pad + 1))]
+
+def _crop_job(job):
+    """Worker: decode one image once (reduced if the crops allow) -> list of tiles + crop windows."""
+    path, boxes, tile, pad_frac = job
+    try:
+        W, H = image_pack.image_size(path)
+    except Exception:
+        return path, None
+    wins = [crop_window(b, W, H, pad_frac) for b in boxes]
+    # largest reduction that still leaves the smallest crop at >= tile resolution
+    smallest = min(max(w[2] - w[0], w[3] - w[1]) for w in wins)
+    flag = cv2.IMREAD_COLOR
+    for fac, fl in image_pack.reduced_flags():
+        if smallest / fac >= tile:
+            flag = fl
+            break
+    img = image_pack.imread(path, flag)
+    if img is None:
+        return path, None
+    # actual decoded scale (reduced decode or a pre-resized pack entry)
+    fx, fy = W / float(img.shape[1]), H / float(img.shape[0])
+    tiles = []
+    for b, (X1, Y1, X2, Y2) in zip(boxes, wins):
+        cx1, cy1 = int(X1 / fx), int(Y1 / fy)
+        crop = img[cy1:max(cy1 + 1, int(Y2 / fy)), cx1:max(cx1 + 1, int(X2 / fx))]
+        ch, cw = crop.shape[:2]
+        s = tile / float(max(ch, cw))
+        tw, th = max(1, int(cw * s)), max(1, int(ch * s))
+        crop = cv2.resize(crop, (tw, th), interpolation=cv2.INTER_AREA if s < 1 else cv2.INTER_LINEAR)
+        cell = np.full((tile, tile, 3), 40, dtype=np.uint8)
+        ox, oy = (tile - tw) // 2, (tile - th) // 2
+        cell[oy:oy + th, ox:ox + tw] = crop
+        k = tw / float(X2 - X1)
+        cv2.rectangle(cell, (ox + int((b[0] - X1) * k), oy + int((b[1] - Y1) * k)),
+                      (ox + int((b[2] - X1) * k), oy + int((b[3] - Y1) * k)), (0, 0, 255), 2)
+        tiles.append(cell)
+    return path, (tiles, wins)
+
+def build_atlas(regions, paths, out_dir, tile=160, cols=8, rows=6, pad_frac=0.5, workers=4, quality=90):
+    """Crop every gap in parallel and pack the tiles into cols x rows atlas JPEGs + index.json."""
+    os.makedirs(out_dir, exist_ok=True)
+    per_page = cols * rows
+    jobs = [(paths[fn], [list(map(float, b[:4])) for b in regions[fn]], tile, pad_frac)
+            for fn in sorted(regions) if regions[fn] and fn in paths]
+    items, atlases, page, failed = [], [], None, []
+
+    def flush():
+        name = f"atlas_{len(atlases):04d}.jpg"
+        cv2.imwrite(os.path.join(out_dir, name), page, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        atlases.append(name)
+
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as ex:
+        # map keeps job order, so atlas layout is deterministic whatever the worker count
+        for (path, boxes, _, _), (_, res) in zip(jobs, ex.map(_crop_job, jobs, chunksize=8)):
+            if res is None:
+                failed.append(path); continue
+            for b, cell, win in zip(boxes, *res):
+                n = len(items) % per_page
+                if n == 0:
+                    if page is not None:
+                        flush()
+                    page = np.full((rows * tile, cols * tile, 3), 20, dtype=np.uint8)
+                r, c = divmod(n, cols)
+                page[r * tile:(r + 1) * tile, c * tile:(c + 1) * tile] = cell
+                items.append({"id": len(items), "atlas": len(atlases), "cell": n,
+                              "filename": os.path.basename(path), "box": b, "crop": win})
+            profiling.count("images"); profiling.count("crops", len(boxes))
+    if page is not None:
+        flush()
+    index = {"tile": tile, "cols": cols, "rows": rows, "atlases": atlases, "items": items}
+    with open(os.path.join(out_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    return index, failed
+
+def load_index(atlas_dir):
+    with open(os.path.join(atlas_dir, "index.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def load_decisions(atlas_dir):
+    p = os.path.join(atlas_dir, "decisions.json")
+    if not os.path.exists(p):
+        return {}
+    with open(p, "r", encoding="utf-8") as f:
+        return {int(k): v for k, v in json.load(f).items()}
+
+def save_decisions(atlas_dir, decisions):
+    p = os.path.join(atlas_dir, "decisions.json")
+    with open(p + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(decisions, f)
+    os.replace(p + ".tmp", p)
+
+class GridReviewer:
+    def __init__(self, atlas_dir, store, zoom=1.0, default_accept=True):
+        self.dir = atlas_dir
+        self.index = load_index(atlas_dir)
+        self.items = self.index["items"]
+        self.pages = [[] for _ in self.index["atlases"]]
+        for it in self.items:
+            self.pages[it["atlas"]].append(it)
+        self.store = store
+        self.zoom = zoom
+        self.default = 1 if default_accept else 0
+        self.decisions = load_decisions(atlas_dir)  # item id -> 1 accept / 0 reject
+        self.page = 0
+        self.state = {}
+        self.img = None
+        self.win = "Gap Atlas Reviewer"
+
+    def first_open_page(self):
+        for i, items in enumerate(self.pages):
+            if any(it["id"] not in self.decisions for it in items):
+                return i
+        return 0
+
+    def load_page(self, i):
+        self.page = i
+        self.img = cv2.imread(os.path.join(self.dir, self.index["atlases"][i]), cv2.IMREAD_COLOR)
+        if self.zoom != 1.0:
+            self.img = cv2.resize(self.img, None, fx=self.zoom, fy=self.zoom, interpolation=cv2.INTER_AREA)
+        self.state = {it["cell"]: self.decisions.get(it["id"], self.default) for it in self.pages[i]}
+
+    def save_page(self):
+        edits = {}
+        for it in self.pages[self.page]:
+            self.decisions[it["id"]] = self.state[it["cell"]]
+            add, remove = edits.setdefault(it["filename"], ([], []))
+            (add if self.state[it["cell"]] else remove).append([int(v) for v in it["box"]])
+        save_decisions(self.dir, self.decisions)
+        for fn, (add, remove) in edits.items():
+            # only this page's own boxes change; boxes drawn in the annotator / highlighter stay
+            self.store.edit_boxes(fn, add, remove)
+        n_ok = sum(self.state.values())
+        print(f"  [SAVED] page {self.page+1}/{len(self.pages)}: {n_ok} accepted, {len(self.state)-n_ok} rejected")
+
+    def on_mouse(self, event, x, y, flags, param):
+        if event != cv2.EVENT_LBUTTONDOWN:
+            return
+        t = self.index["tile"] * self.zoom
+        cell = int(y // t) * self.index["cols"] + int(x // t)
+        if cell in self.state and x < self.index["cols"] * t:
+            self.state[cell] ^= 1
+            self.redraw()
+
+    def redraw(self):
+        v = self.img.copy()
+        t = self.index["tile"] * self.zoom
+        cols = self.index["cols"]
+        for it in self.pages[self.page]:
+            r, c = divmod(it["cell"], cols)
+            x1, y1 = int(c * t), int(r * t); x2, y2 = int((c + 1) * t) - 1, int((r + 1) * t) - 1
+            if self.state[it["cell"]]:
+                cv2.rectangle(v, (x1, y1), (x2, y2), (0, 200, 0), 2)
+            else:
+                cell = v[y1:y2, x1:x2]
+                cell[:] = (cell * 0.4).astype(np.uint8)
+                cv2.line(v, (x1, y1), (x2, y2), (0, 0, 255), 2); cv2.line(v, (x1, y2), (x2, y1), (0, 0, 255), 2)
+            cv2.putText(v, str(it["cell"] + 1), (x1 + 4, y1 + 14), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1, cv2.LINE_AA)
+        txt = f"page {self.page+1}/{len(self.pages)}  cells {len(self.state)}  (click toggles; ENTER next, p prev, a/r all, q quit)"
+        bar = np.zeros((24, v.shape[1], 3), dtype=np.uint8)
+        cv2.putText(bar, txt, (6, 16), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1, cv2.LINE_AA)
+        cv2.imshow(self.win, np.vstack([v, bar]))
+
+    def run(self):
+        if not self.pages:
+            print("No gap crops in this atlas."); return
+        print(HELP)
+        cv2.namedWindow(self.win, cv2.WINDOW_NORMAL)
+        cv2.setMouseCallback(self.win, self.on_mouse)
+        self.load_page(self.first_open_page())
+        self.redraw()
+        while True:
+            k = cv2.waitKey(30) & 0xFF
+            if k == 255:
+                continue
+            if k in (13, 10, 32, ord('n')):
+                self.save_page()
+                if self.page + 1 >= len(self.pages):
+                    print("\n[Done] Reached last page."); break
+                self.load_page(self.page + 1); self.redraw()
+            elif k in (ord('p'), ord('b')):
+                self.save_page()
+                self.load_page(max(0, self.page - 1)); self.redraw()
+            elif k == ord('a'):
+                self.state = {c: 1 for c in self.state}; self.redraw()
+            elif k == ord('r'):
+                self.state = {c: 0 for c in self.state}; self.redraw()
+            elif k in (ord('q'), 27):
+                self.save_page(); break
+            elif k == ord('h'):
+                print(HELP)
+        cv2.destroyAllWindows()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Pack predicted gap crops into atlas images and review them in a grid.")
+    sub = ap.add_subparsers(dest="action", required=True)
+    b = sub.add_parser("build", help="Crop every gap of oos_regions.json (in parallel) into atlas JPEGs + index.json")
+    b.add_argument("--pred_json", required=True, help=r"e.g., outputs\oos_vis_main\oos_regions.json")
+    b.add_argument("--images_dir", required=True, help="Images the predictions refer to")
+    b.add_argument("--out_dir", required=True, help="Atlas directory")
+    b.add_argument("--tile", type=int, default=160, help="Cell size in px")
+    b.add_argument("--cols", type=int, default=8)
+    b.add_argument("--rows", type=int, default=6)
+    b.add_argument("--pad", type=float, default=0.5, help="Context around each gap, as a fraction of its longer side")
+    b.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    b.add_argument("--manifest", default="", help="Subset manifest; --images_dir is then the subset root")
+    b.add_argument("--split", default="test", help="Split to read from --manifest")
+    profiling.add_profile_args(b)
+    r = sub.add_parser("review", help="Accept/reject many crops per screen; writes filename,x1,y1,x2,y2 CSV")
+    r.add_argument("--atlas_dir", required=True)
+    r.add_argument("--out_csv", required=True, help=r"e.g., data\oos_gt_main.csv")
+    r.add_argument("--store", default="", help="Annotation store (default: <out_csv>.sqlite); CSV is exported from it on quit/done")
+    r.add_argument("--zoom", type=float, default=1.0, help="Display scale of the atlas pages")
+    r.add_argument("--default", choices=["accept", "reject"], default="accept", help="State of cells not yet reviewed")
+    args = ap.parse_args(argv)
+
+    if args.action == "build":
+        profiling.start("gap_atlas", args)
+        with open(args.pred_json, "r", encoding="utf-8") as f:
+            regions = json.load(f)
+        if args.manifest:
+            paths = {os.path.basename(p): p for p in split_images(args.images_dir, args.split, load_manifest(args.manifest))}
+        else:
+            paths = {fn: os.path.join(args.images_dir, fn) for fn in regions}
+        with profiling.stage("build_atlas"):
+            index, failed = build_atlas(regions, paths, args.out_dir, args.tile, args.cols, args.rows, args.pad, args.workers)
+        for p in failed[:10]:
+            print("  [WARN] Failed to read:", p)
+        print(f"[OK] {len(index['items'])} gap crops -> {len(index['atlases'])} atlas pages in {args.out_dir}")
+        profiling.finish()
+        return
+
+    store = AnnotationStore(args.store or default_store_path(args.out_csv), seed_csv=args.out_csv)
+    GridReviewer(args.atlas_dir, store, args.zoom, args.default == "accept").run()
+    n = store.export_csv(args.out_csv); store.close()
+    print(f"[OK] exported {n} rows to {args.out_csv}")
+    print("Convert CSV to JSON:")
+    print(r"  oos csv2gt --csv_path data\oos_gt_main.csv --images_dir data\sku110k_subset_strat\images\test --out_json data\oos_gt_main.json")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import os, re, json, time, hashlib, sqlite3, argparse
+from datetime import datetime, timezone
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (run_id INTEGER PRIMARY KEY, ts REAL NOT NULL, source TEXT, ingested REAL);
+CREATE TABLE IF NOT EXISTS observations (obs_id INTEGER PRIMARY KEY, run_id INTEGER NOT NULL, ts REAL NOT NULL,
+    camera TEXT NOT NULL, image TEXT NOT NULL, n_products INTEGER, n_gaps INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS obs_camera_ts ON observations(camera, ts);
+CREATE INDEX IF NOT EXISTS obs_ts ON observations(ts);
+CREATE TABLE IF NOT EXISTS gaps (obs_id INTEGER NOT NULL, slot INTEGER, x1 REAL, y1 REAL, x2 REAL, y2 REAL);
+CREATE INDEX IF NOT EXISTS gaps_obs ON gaps(obs_id);
+CREATE TABLE IF NOT EXISTS detections (obs_id INTEGER NOT NULL, x1 REAL, y1 REAL, x2 REAL, y2 REAL);
+CREATE INDEX IF NOT EXISTS det_obs ON detections(obs_id);
+-- current out-of-stock streak per camera (slot -1) and per camera slot, kept up to date on ingest
+CREATE TABLE IF NOT EXISTS streaks (camera TEXT NOT NULL, slot INTEGER NOT NULL, streak INTEGER NOT NULL,
+    since_ts REAL, last_ts REAL, PRIMARY KEY (camera, slot));
+CREATE INDEX IF NOT EXISTS streaks_len ON streaks(streak);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+def parse_time(value):
+    """Epoch seconds or ISO 8601 (naive = UTC) -> epoch seconds."""
+    try:
+        return float(value)
+    except ValueError:
+        dt = datetime.fromisoformat(value)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+
+def fmt_time(ts):
+    if ts is None:
+        return "-"
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def camera_namer(camera="", regex=""):
+    """filename -> camera id: a fixed id, the first regex group, or the file stem."""
+    if camera:
+        return lambda fn: camera
+    if regex:
+        rx = re.compile(regex)
+        def name(fn):
+            m = rx.search(fn)
+            return m.group(1) if m else os.path.splitext(fn)[0]
+        return name
+    return lambda fn: os.path.splitext(os.path.basename(fn))[0]
+
+class HistoryStore:
+    """Time series of OOS results per camera, backed by SQLite (WAL) like AnnotationStore."""
+    def __init__(self, path, slot_px=200):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        if "digest" not in [c[1] for c in self.conn.execute("PRAGMA table_info(runs)")]:
+            self.conn.execute("ALTER TABLE runs ADD COLUMN digest TEXT")  # stores from before run dedup
+        self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS runs_digest ON runs(digest)")
+        # slot width is fixed at creation so slot ids stay comparable across runs
+        row = self.conn.execute("SELECT value FROM meta WHERE key='slot_px'").fetchone()
+        if row is None:
+            with self.conn:
+                self.conn.execute("INSERT INTO meta VALUES ('slot_px', ?)", (str(slot_px),))
+            row = (str(slot_px),)
+        self.slot_px = float(row[0])
+
+    def slot_of(self, box):
+        return int(((box[0] + box[2]) / 2) // self.slot_px)
+
+    def add_run(self, ts, regions, detections=None, camera_of=None, source="", keep_detections=False):
+        """Insert one run ({image: gap boxes}, optional {image: product boxes}) in a single transaction.
+
+        Returns (run_id, observations). A run with the same timestamp and content as one already
+        stored is skipped and returns (existing run_id, None), so re-ingesting a file is harmless.
+        """
+        camera_of = camera_of or camera_namer()
+        detections = detections or {}
+        digest = hashlib.sha256(json.dumps([ts, regions, detections], sort_keys=True).encode()).hexdigest()
+        row = self.conn.execute("SELECT run_id FROM runs WHERE digest=?", (digest,)).fetchone()
+        if row is not None:
+            return row[0], None
+        with self.conn:
+            run_id = self.conn.execute("INSERT INTO runs (ts, source, ingested, digest) VALUES (?,?,?,?)",
+                                       (ts, source, time.time(), digest)).lastrowid
+            obs, gap_rows, det_rows = [], [], []
+            next_id = (self.conn.execute("SELECT COALESCE(MAX(obs_id), 0) FROM observations").fetchone()[0]) + 1
+            for image in sorted(set(regions) | set(detections)):
+                gaps = regions.get(image, [])
+                dets = detections.get(image)
+                oid = next_id; next_id += 1
+                obs.append((oid, run_id, ts, camera_of(image), image, None if dets is None else len(dets), len(gaps)))
+                gap_rows += [(oid, self.slot_of(b), *map(float, b[:4])) for b in gaps]
+                if keep_detections and dets:
+                    det_rows += [(oid, *map(float, b[:4])) for b in dets]
+            self.conn.executemany("INSERT INTO observations VALUES (?,?,?,?,?,?,?)", obs)
+            self.conn.executemany("INSERT INTO gaps VALUES (?,?,?,?,?,?)", gap_rows)
+            if det_rows:
+                self.conn.executemany("INSERT INTO detections VALUES (?,?,?,?,?)", det_rows)
+            self._update_streaks(ts, obs, gap_rows)
+        return run_id, len(obs)
+
+    def _update_streaks(self, ts, obs, gap_rows):
+        # a camera counts once per run: out of stock if any of its images had a gap
+        slots = {}
+        for oid, slot, *_ in gap_rows:
+            slots.setdefault(oid, set()).add(slot)
+        per_camera = {}
+        for oid, _, _, camera, _, _, n_gaps in obs:
+            now = per_camera.setdefault(camera, set())
+            if n_gaps:
+                now |= {-1} | slots.get(oid, set())
+        for camera, now in per_camera.items():
+            last = self.conn.execute("SELECT MAX(last_ts) FROM streaks WHERE camera=?", (camera,)).fetchone()[0]
+            if last is not None and ts <= last:
+                self._rebuild_streaks(camera)  # back-filled older run: replay this camera's history
+                continue
+            prev = {s: (n, since) for s, n, since in self.conn.execute(
+                "SELECT slot, streak, since_ts FROM streaks WHERE camera=? AND streak > 0", (camera,))}
+            self.conn.execute("DELETE FROM streaks WHERE camera=?", (camera,))
+            rows = [(camera, s, prev[s][0] + 1 if s in prev else 1, prev[s][1] if s in prev else ts, ts) for s in now]
+            # observed in stock: keep a row anyway so last_ts reveals back-filled runs
+            self.conn.executemany("INSERT INTO streaks VALUES (?,?,?,?,?)", rows or [(camera, -1, 0, None, ts)])
+
+    def _rebuild_streaks(self, camera):
+        cur = self.conn.execute("""SELECT o.run_id, o.ts, o.n_gaps, g.slot FROM observations o
+                                   LEFT JOIN gaps g ON g.obs_id = o.obs_id
+                                   WHERE o.camera=? ORDER BY o.ts, o.run_id""", (camera,))
+        history = []  # [run_id, ts, {slots}] in time order; -1 marks the camera itself
+        for run_id, ts, n_gaps, slot in cur:
+            if not history or history[-1][0] != run_id:
+                history.append([run_id, ts, set()])
+            if n_gaps:
+                history[-1][2].add(-1)
+            if slot is not None:
+                history[-1][2].add(slot)
+        state = {}
+        for _, ts, now in history:
+            state = {s: (state[s][0] + 1, state[s][1]) if s in state else (1, ts) for s in now}
+        last_ts = history[-1][1] if history else None
+        self.conn.execute("DELETE FROM streaks WHERE camera=?", (camera,))
+        rows = [(camera, s, n, since, last_ts) for s, (n, since) in state.items()]
+        self.conn.executemany("INSERT INTO streaks VALUES (?,?,?,?,?)", rows or [(camera, -1, 0, None, last_ts)])
+
+    def persistent(self, min_runs=3, level="camera"):
+        """Cameras (or camera slots) out of stock in each of their last `min_runs` runs."""
+        min_runs = max(1, min_runs)  # streak-0 rows are "not out of stock", never a match
+        where = "slot = -1" if level == "camera" else "slot >= 0"
+        return self.conn.execute(f"""SELECT camera, slot, streak, since_ts, last_ts FROM streaks
+                                     WHERE streak >= ? AND {where} ORDER BY streak DESC, camera, slot""",
+                                 (min_runs,)).fetchall()
+
+    def summary(self, since=None, until=None, camera=None):
+        """Per camera over [since, until]: runs, runs with gaps, gap total, products per run.
+
+        A camera can have several images in one run, so runs are counted by run_id, not by row.
+        """
+        q = ["""SELECT camera, COUNT(DISTINCT run_id), COUNT(DISTINCT CASE WHEN n_gaps > 0 THEN run_id END), SUM(n_gaps),
+                       SUM(n_products) * 1.0 / COUNT(DISTINCT CASE WHEN n_products IS NOT NULL THEN run_id END),
+                       MIN(ts), MAX(ts) FROM observations WHERE 1=1"""]
+        args = []
+        if camera:
+            q.append("AND camera = ?"); args.append(camera)
+        if since is not None:
+            q.append("AND ts >= ?"); args.append(since)
+        if until is not None:
+            q.append("AND ts <= ?"); args.append(until)
+        q.append("GROUP BY camera ORDER BY COUNT(DISTINCT CASE WHEN n_gaps > 0 THEN run_id END) * 1.0 / COUNT(DISTINCT run_id) DESC, camera")
+        return self.conn.execute(" ".join(q), args).fetchall()
+
+    def timeline(self, camera, since=None, until=None):
+        q = "SELECT ts, image, n_products, n_gaps FROM observations WHERE camera = ? AND ts >= ? AND ts <= ? ORDER BY ts"
+        return self.conn.execute(q, (camera, since if since is not None else float("-inf"),
+                                     until if until is not None else float("inf"))).fetchall()
+
+    def gap_boxes(self, camera, since=None, until=None):
+        q = """SELECT o.ts, o.image, g.slot, g.x1, g.y1, g.x2, g.y2 FROM observations o JOIN gaps g ON g.obs_id = o.obs_id
+               WHERE o.camera = ? AND o.ts >= ? AND o.ts <= ? ORDER BY o.ts"""
+        return self.conn.execute(q, (camera, since if since is not None else float("-inf"),
+                                     until if until is not None else float("inf"))).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+def read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="OOS history store: ingest gap results per run, query persistence and aggregates.")
+    ap.add_argument("--store", default="outputs/oos_history.sqlite", help="History SQLite file")
+    sub = ap.add_subparsers(dest="action", required=True)
+    i = sub.add_parser("ingest", help="Add one run per oos_regions.json (one transaction each)")
+    i.add_argument("--regions_json", nargs="+", required=True, help="oos_regions.json from `oos gaps`")
+    i.add_argument("--detections_json", default="", help="Detections of the same run (product counts); single run only")
+    i.add_argument("--keep_detections", action="store_true", help="Also store product boxes, not just counts")
+    i.add_argument("--ts", default="mtime", help="Run time: epoch, ISO 8601, or 'mtime' of each regions JSON")
+    i.add_argument("--camera", default="", help="Camera id for every image (default: image file stem)")
+    i.add_argument("--camera_regex", default="", help="Regex whose first group is the camera id, e.g. '^(cam\\d+)_'")
+    i.add_argument("--slot_px", type=float, default=200, help="Slot width in px for slot-level persistence (fixed per store)")
+    p = sub.add_parser("persistent", help="Cameras / slots out of stock in each of their last N runs")
+    p.add_argument("--min_runs", type=int, default=3, help="Consecutive out-of-stock runs (>= 1)")
+    p.add_argument("--level", choices=["camera", "slot"], default="camera")
+    s = sub.add_parser("summary", help="Per-camera OOS rate and gap totals over a time range")
+    t = sub.add_parser("timeline", help="Per-run counts (and gap boxes) for one camera")
+    t.add_argument("--camera", required=True)
+    t.add_argument("--boxes", action="store_true", help="List gap boxes too")
+    for q in (s, t):
+        q.add_argument("--since", default="", help="Epoch or ISO 8601")
+        q.add_argument("--until", default="", help="Epoch or ISO 8601")
+    s.add_argument("--camera", default="")
+    s.add_argument("--top", type=int, default=20)
+    args = ap.parse_args(argv)
+
+    store = HistoryStore(args.store, slot_px=getattr(args, "slot_px", 200))
+    t0 = time.perf_counter()
+    if args.action == "ingest":
+        if args.detections_json and len(args.regions_json) > 1:
+            raise SystemExit("[ERROR] --detections_json goes with a single --regions_json")
+        det = read_json(args.detections_json) if args.detections_json else None
+        camera_of = camera_namer(args.camera, args.camera_regex)
+        total = runs = 0
+        for path in args.regions_json:
+            ts = os.path.getmtime(path) if args.ts == "mtime" else parse_time(args.ts)
+            run_id, n = store.add_run(ts, read_json(path), det, camera_of, source=os.path.abspath(path),
+                                      keep_detections=args.keep_detections)
+            if n is None:
+                print(f"[SKIP] {path} @ {fmt_time(ts)} is already run {run_id}")
+                continue
+            total += n; runs += 1
+            print(f"[OK] run {run_id} @ {fmt_time(ts)}: {n} images from {path}")
+        print(f"[OK] ingested {runs} runs ({total} observations) into {args.store}")
+    elif args.action == "persistent":
+        if args.min_runs < 1:
+            raise SystemExit("[ERROR] --min_runs must be >= 1")
+        rows = store.persistent(args.min_runs, args.level)
+        for camera, slot, streak, since, last in rows:
+            where = camera if slot < 0 else f"{camera} slot {slot}"
+            print(f"  {where:<30s} {streak:4d} runs  since {fmt_time(since)}  last {fmt_time(last)}")
+        print(f"[OK] {len(rows)} {args.level}(s) out of stock for >= {args.min_runs} consecutive runs")
+    elif args.action == "summary":
+        since = parse_time(args.since) if args.since else None
+        until = parse_time(args.until) if args.until else None
+        rows = store.summary(since, until, args.camera or None)
+        print(f"  {'camera':<24s} {'runs':>6s} {'oos':>6s} {'rate':>6s} {'gaps':>7s} {'prod/run':>8s}")
+        for camera, runs, oos_runs, gaps, prod, _, _ in rows[:args.top]:
+            prod_s = f"{prod:8.1f}" if prod is not None else f"{'-':>8s}"
+            print(f"  {camera:<24s} {runs:6d} {oos_runs:6d} {oos_runs/runs:6.1%} {gaps:7d} {prod_s}")
+        print(f"[OK] {len(rows)} cameras")
+    else:
+        since = parse_time(args.since) if args.since else None
+        until = parse_time(args.until) if args.until else None
+        rows = store.timeline(args.camera, since, until)
+        for ts, image, n_prod, n_gaps in rows:
+            print(f"  {fmt_time(ts)}  {image:<30s} products={'-' if n_prod is None else n_prod} gaps={n_gaps}")
+        if args.boxes:
+            for ts, image, slot, x1, y1, x2, y2 in store.gap_boxes(args.camera, since, until):
+                print(f"  {fmt_time(ts)}  {image:<30s} slot={slot} [{x1:.0f},{y1:.0f},{x2:.0f},{y2:.0f}]")
+        print(f"[OK] {len(rows)} runs for {args.camera}")
+    print(f"  ({(time.perf_counter() - t0) * 1000:.1f} ms)")
+    store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import os, io, sys, glob, json, mmap, struct, fnmatch, argparse
+from ._lazy import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+Image = lazy_import("PIL.Image")
+ImageOps = lazy_import("PIL.ImageOps")
+
+# layout: 64-byte header (magic, index offset, index length), 64-byte aligned
+# blobs, then a JSON index {name: [offset, nbytes, h, w, orig_w, orig_h]}
+MAGIC = b"OOSPACK1"
+HEADER = 64
+ALIGN = 64
+IMAGE_EXTS = ("*.jpg","*.jpeg","*.png","*.JPG","*.PNG")
+ROTATED = (5, 6, 7, 8)  # EXIF orientations that swap width and height
+
+# sizes and pixels follow cv2.imread's convention (EXIF orientation applied) for
+# files, encoded and raw packs alike, so boxes mean the same thing everywhere
+def exif_orientation(im):
+    try:
+        return im.getexif().get(0x0112, 1)
+    except Exception:
+        return 1
+
+def oriented_size(im):
+    W, H = im.size
+    return (H, W) if exif_orientation(im) in ROTATED else (W, H)
+
+def oriented(im):
+    return ImageOps.exif_transpose(im) if exif_orientation(im) not in (1, None) else im
+
+class ImagePack:
+    """Read-only view of a pack file; blobs are slices of one shared mmap (no per-image open)."""
+    def __init__(self, path):
+        self.path = path
+        self.f = open(path, "rb")
+        self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mm[:8] != MAGIC:
+            raise ValueError(f"not an image pack: {path}")
+        off, n = struct.unpack("<QQ", self.mm[8:24])
+        meta = json.loads(bytes(self.mm[off:off + n]).decode("utf-8"))
+        self.mode = meta["mode"]
+        self.max_side = meta.get("max_side", 0)
+        self.items = meta["items"]
+
+    def names(self):
+        return sorted(self.items)
+
+    def __contains__(self, name):
+        return name in self.items
+
+    def __len__(self):
+        return len(self.items)
+
+    def size(self, name):
+        """Original (W, H) of the source image, even for pre-resized packs."""
+        it = self.items[name]
+        return it[4], it[5]
+
+    def buffer(self, name):
+        off, n = self.items[name][:2]
+        return memoryview(self.mm)[off:off + n]
+
+    def array(self, name, flag=None):
+        """BGR uint8 image: a zero-copy (read-only) view for raw packs, decoded for encoded ones."""
+        off, n, h, w = self.items[name][:4]
+        if self.mode == "raw":
+            return np.frombuffer(self.mm, dtype=np.uint8, count=n, offset=off).reshape(h, w, 3)
+        buf = np.frombuffer(self.mm, dtype=np.uint8, count=n, offset=off)
+        return cv2.imdecode(buf, cv2.IMREAD_COLOR if flag is None else flag)
+
+    def pil(self, name):
+        if self.mode == "raw":
+            return Image.fromarray(np.ascontiguousarray(self.array(name)[:, :, ::-1]))
+        return oriented(Image.open(io.BytesIO(self.buffer(name))))
+
+    def close(self):
+        self.mm.close(); self.f.close()
+
+_packs = {}
+
+def is_pack(path):
+    if path in _packs:
+        return _packs[path] is not None
+    ok = False
+    if os.path.isfile(path):
+        with open(path, "rb") as f:
+            ok = f.read(8) == MAGIC
+    _packs[path] = ImagePack(path) if ok else None
+    return ok
+
+def open_pack(path):
+    return _packs[path] if is_pack(path) else None
+
+def resolve(ref):
+    """'<pack>/<name>' -> (pack, name); plain file paths -> (None, ref)."""
+    d = os.path.dirname(ref)
+    if d and not os.path.isdir(d) and is_pack(d):
+        return _packs[d], os.path.basename(ref)
+    return None, ref
+
+def list_images(images_dir, patterns=IMAGE_EXTS):
+    """Sorted image refs of a directory or a pack (used wherever --images_dir is read)."""
+    if is_pack(images_dir):
+        pack = _packs[images_dir]
+        return [os.path.join(images_dir, n) for n in pack.names() if any(fnmatch.fnmatchcase(n, p) for p in patterns)]
+    paths = []
+    for ext in patterns:
+        paths += glob.glob(os.path.join(images_dir, ext))
+    return sorted(set(paths))
+
+def reduced_flags():
+    """(factor, cv2 flag) pairs for decoding JPEGs straight at 1/8, 1/4 or 1/2 scale."""
+    return ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+def exists(ref):
+    pack, name = resolve(ref)
+    return name in pack if pack is not None else os.path.isfile(ref)
+
+def image_size(ref):
+    pack, name = resolve(ref)
+    if pack is not None:
+        return pack.size(name)
+    with Image.open(ref) as im:
+        return oriented_size(im)
+
+def imread(ref, flag=None):
+    """cv2.imread for files or pack refs. Pre-resized packs return their stored size; compare with image_size()."""
+    pack, name = resolve(ref)
+    if pack is not None:
+        return pack.array(name, flag) if name in pack else None
+    return cv2.imread(ref, cv2.IMREAD_COLOR if flag is None else flag)
+
+def open_pil(ref):
+    pack, name = resolve(ref)
+    if pack is not None:
+        return pack.pil(name)
+    with Image.open(ref) as im:
+        im.load()  # oriented() may return im itself; read it before the file is closed
+        return oriented(im)
+
+def predict_source(ref):
+    """What to hand model.predict(): the path for files, a BGR array for pack entries."""
+    pack, name = resolve(ref)
+    return pack.array(name) if pack is not None else ref
+
+def to_original(boxes, ref, shape):
+    """Scale boxes found on a decoded image of `shape` back to original pixel coords."""
+    W, H = image_size(ref)
+    sx, sy = W / float(shape[1]), H / float(shape[0])
+    if sx == 1.0 and sy == 1.0:
+        return boxes
+    return [[b[0] * sx, b[1] * sy, b[2] * sx, b[3] * sy] for b in boxes]
+
+def _encoded_job(path):
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        with Image.open(io.BytesIO(data)) as im:
+            W, H = oriented_size(im)
+    except Exception:
+        return None
+    return data, H, W, W, H
+
+def _raw_job(job):
+    path, max_side = job
+    img = cv2.imread(path, cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+    H, W = img.shape[:2]
+    if max_side > 0 and max(H, W) > max_side:
+        s = max_side / float(max(H, W))
+        img = cv2.resize(img, (int(round(W * s)), int(round(H * s))), interpolation=cv2.INTER_AREA)
+    h, w = img.shape[:2]
+    return np.ascontiguousarray(img).tobytes(), h, w, W, H
+
+def build_pack(paths, out_path, mode="encoded", max_side=0, workers=4):
+    """Write paths into one pack, in order; decoding (raw mode) runs in worker processes."""
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor  # build only; keeps readers light
+    names = [os.path.basename(p) for p in paths]
+    seen = set()
+    dup = {n for n in names if n in seen or seen.add(n)}
+    if dup:
+        raise SystemExit(f"[ERROR] duplicate file names cannot share a pack: {sorted(dup)[:5]}")
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    tmp = out_path + ".tmp"
+    items, failed = {}, []
+    if mode == "raw":
+        ex = ProcessPoolExecutor(max_workers=max(1, workers))
+        results = ex.map(_raw_job, [(p, max_side) for p in paths], chunksize=4)
+    else:
+        # encoded: just bytes + header, so threads (I/O bound) are enough
+        ex = ThreadPoolExecutor(max_workers=max(1, workers))
+        results = ex.map(_encoded_job, paths)
+    with ex, open(tmp, "wb") as f:
+        f.write(b"\0" * HEADER)
+        pos = HEADER
+        for name, p, res in zip(names, paths, results):
+            if res is None:
+                failed.append(p); continue
+            data, h, w, W, H = res
+            f.write(data)
+            items[name] = [pos, len(data), h, w, W, H]
+            pos += len(data)
+            pad = -pos % ALIGN
+            f.write(b"\0" * pad); pos += pad
+        index = json.dumps({"version": 1, "mode": mode, "max_side": max_side, "items": items}).encode("utf-8")
+        f.write(index)
+        f.seek(0)
+        f.write(MAGIC + struct.pack("<QQ", pos, len(index)))
+    os.replace(tmp, out_path)
+    _packs.pop(out_path, None)
+    return len(items), failed
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build / inspect image packs: one memory-mapped file usable wherever --images_dir is.")
+    sub = ap.add_subparsers(dest="action", required=True)
+    b = sub.add_parser("build", help="Pack an images directory (in parallel)")
+    b.add_argument("--images_dir", required=True)
+    b.add_argument("--out", required=True, help="Pack file, e.g. data/test.oospack")
+    b.add_argument("--mode", choices=["encoded", "raw"], default="encoded",
+                   help="encoded: original JPEG/PNG bytes; raw: decoded BGR uint8 arrays (zero-copy reads, no decode)")
+    b.add_argument("--max_side", type=int, default=0, help="raw mode: pre-resize so the longer side is at most this (0=keep)")
+    b.add_argument("--pattern", default="", help="Comma-separated globs (default: jpg/jpeg/png)")
+    b.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    i = sub.add_parser("info", help="Summary of a pack")
+    i.add_argument("--pack", required=True)
+    i.add_argument("--list", action="store_true", help="Print every entry")
+    args = ap.parse_args(argv)
+
+    if args.action == "build":
+        patterns = tuple(p for p in args.pattern.split(",") if p) or IMAGE_EXTS
+        paths = list_images(args.images_dir, patterns)
+        if not paths:
+            print("No images found:", args.images_dir); sys.exit(1)
+        n, failed = build_pack(paths, args.out, args.mode, args.max_side, args.workers)
+        for p in failed[:10]:
+            print("  [WARN] Failed to read:", p)
+        print(f"[OK] packed {n} images ({args.mode}) into {args.out} ({os.path.getsize(args.out)/1e6:.1f} MB)")
+        print(f"Use it in place of the directory, e.g. --images_dir {args.out}")
+        return
+    pack = open_pack(args.pack)
+    if pack is None:
+        raise SystemExit(f"[ERROR] not an image pack: {args.pack}")
+    print(f"{args.pack}: {len(pack)} images, mode={pack.mode}, max_side={pack.max_side or '-'}, "
+          f"{os.path.getsize(args.pack)/1e6:.1f} MB")
+    if args.list:
+        for n in pack.names():
+            off, nb, h, w, W, H = pack.items[n]
+            print(f"  {n:<40s} {nb:>10d} B  stored {w}x{h}  original {W}x{H}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import argparse, json, os, time
+from . import profiling, image_pack
+from .subset_qc_tools import load_manifest, split_images
+from .raw_cache import CACHE_CONF, CACHE_IOU, CACHE_MAX_DET, clamp_boxes, save_cache, RawCache, postprocess
+from .autotune import load_profile, resolve_settings
+
+DEFAULTS = {"imgsz": 640, "batch": 1, "threads": 0, "workers": 1}
+
+def load_model(weights, threads=0):
+    from ultralytics import YOLO  # heavy (torch); only paid when inference actually runs
+    if threads > 0:
+        import torch
+        torch.set_num_threads(threads)  # intra-op threads; process-wide
+    return YOLO(weights)
+
+def predict_paths(model, paths, imgsz=640, conf=0.25, iou=0.45, device=None, batch=1, raw=False, latencies=None):
+    """Predict in batches -> [(name, W, H, boxes)] in original pixels; raw=True gives (xyxy, scores, classes) pre-NMS.
+
+    `latencies` (a list) receives each image's batch wall time.
+    """
+    out = []
+    batch = max(1, batch)
+    kw = dict(conf=CACHE_CONF, iou=CACHE_IOU, max_det=CACHE_MAX_DET) if raw else dict(conf=conf, iou=iou)
+    for i in range(0, len(paths), batch):
+        chunk = paths[i:i + batch]
+        with profiling.stage("image_size"):
+            sizes = [image_pack.image_size(p) for p in chunk]
+        with profiling.stage("read_image"):
+            srcs = [image_pack.predict_source(p) for p in chunk]  # the path itself, or a (decoded) pack entry
+        t0 = time.perf_counter()
+        with profiling.stage("predict"):
+            # batch= matters for path lists: ultralytics' file loader otherwise yields them one at a time
+            results = model.predict(srcs if len(srcs) > 1 else srcs[0], imgsz=imgsz, device=device, batch=len(srcs),
+                                    verbose=False, **kw)
+        if latencies is not None:
+            latencies += [time.perf_counter() - t0] * len(chunk)
+        for p, (W, H), src, res in zip(chunk, sizes, srcs, results):
+            name = os.path.basename(p)
+            if raw:
+                # keep every candidate above the floor; conf/iou are applied from the cache later
+                with profiling.stage("collect_raw"):
+                    if res and res.boxes is not None:
+                        xyxy = res.boxes.xyxy.cpu().numpy()
+                        if not isinstance(src, str):
+                            xyxy = xyxy * ([W / src.shape[1], H / src.shape[0]] * 2)  # pre-resized pack entry
+                        out.append((name, W, H, (xyxy, res.boxes.conf.cpu().numpy(), res.boxes.cls.cpu().numpy())))
+                    else:
+                        out.append((name, W, H, ([], [], [])))
+                profiling.count("images"); profiling.count("raw_boxes", len(out[-1][3][1]))
+                continue
+            with profiling.stage("postprocess"):
+                boxes_xyxy = []
+                if res and res.boxes is not None:
+                    boxes = res.boxes.xyxy.cpu().numpy().tolist()
+                    if not isinstance(src, str):
+                        boxes = image_pack.to_original(boxes, p, src.shape)
+                    boxes_xyxy = clamp_boxes(boxes, W, H)
+            out.append((name, W, H, boxes_xyxy))
+            profiling.count("images"); profiling.count("boxes", len(boxes_xyxy))
+    return out
+
+def _predict_job(job):
+    weights, paths, imgsz, conf, iou, device, batch, threads, raw = job
+    return predict_paths(load_model(weights, threads), paths, imgsz, conf, iou, device, batch, raw)
+
+def run(weights, images_dir, out_json, imgsz=640, conf=0.25, iou=0.45, device=None, manifest=None, split="test", raw_cache="",
+        batch=1, threads=0, workers=1):
+    if manifest is not None:
+        # images_dir is the subset root; the (possibly virtual) split comes from the manifest
+        paths = split_images(images_dir, split, manifest)
+    else:
+        # a directory or an image pack (`oos pack build`)
+        paths = image_pack.list_images(images_dir)
+    raw = bool(raw_cache)
+    if workers > 1 and len(paths) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        workers = min(workers, len(paths))
+        if threads <= 0:
+            threads = max(1, (os.cpu_count() or 1) // workers)  # don't let every worker grab all cores
+        jobs = [(weights, paths[i::workers], imgsz, conf, iou, device, batch, threads, raw) for i in range(workers)]
+        with profiling.stage("predict_workers"), ProcessPoolExecutor(max_workers=workers) as ex:
+            by_name = {r[0]: r for part in ex.map(_predict_job, jobs) for r in part}
+        results = [by_name[os.path.basename(p)] for p in paths]
+    else:
+        with profiling.stage("load_model"):
+            model = load_model(weights, threads)
+        results = predict_paths(model, paths, imgsz, conf, iou, device, batch, raw)
+    if raw:
+        with profiling.stage("write_cache"):
+            save_cache(raw_cache, [r[0] for r in results], [(r[1], r[2]) for r in results],
+                       [r[3][0] for r in results], [r[3][1] for r in results],
+                       {"weights": weights, "imgsz": imgsz, "conf_floor": CACHE_CONF, "device": device},
+                       classes=[r[3][2] for r in results])
+        print(f"[OK] cached raw predictions for {len(results)} images to {raw_cache}")
+        with profiling.stage("postprocess"):
+            out = postprocess(RawCache(raw_cache), conf=conf, iou=iou)
+    else:
+        out = {name: boxes for name, _, _, boxes in results}
+    with profiling.stage("write_json"):
+        os.makedirs(os.path.dirname(out_json), exist_ok=True)
+        with open(out_json, "w", encoding="utf-8") as f:
+            json.dump(out, f)
+    print(f"[OK] wrote detections for {len(paths)} images to {out_json}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--weights", required=True)
+    ap.add_argument("--images_dir", required=True)
+    ap.add_argument("--out_json", required=True)
+    ap.add_argument("--imgsz", type=int, default=None, help="Default: tuned profile (`oos autotune`), else 640")
+    ap.add_argument("--conf", type=float, default=0.25)
+    ap.add_argument("--iou", type=float, default=0.45)
+    ap.add_argument("--device", default=None, help="cuda:0 or cpu")
+    ap.add_argument("--batch", type=int, default=None, help="Images per predict call (default: tuned profile, else 1)")
+    ap.add_argument("--threads", type=int, default=None, help="Torch intra-op threads, 0 = torch default (default: tuned profile)")
+    ap.add_argument("--workers", type=int, default=None, help="Inference processes (default: tuned profile, else 1)")
+    ap.add_argument("--no_tuned", action="store_true", help="Ignore the autotune profile")
+    ap.add_argument("--manifest", default="", help="Subset manifest; --images_dir is then the subset root")
+    ap.add_argument("--split", default="test", help="Split to read from --manifest")
+    ap.add_argument("--raw_cache", default="", help="Also save pre-NMS candidates here (.npz) for `oos repost` sweeps")
+    profiling.add_profile_args(ap)
+    args = ap.parse_args(argv)
+    profiling.start("infer_yolo", args)
+    tuned = {} if args.no_tuned else load_profile(args.weights, args.device)
+    s = resolve_settings(args, tuned, DEFAULTS)
+    manifest = load_manifest(args.manifest) if args.manifest else None
+    run(args.weights, args.images_dir, args.out_json, imgsz=s["imgsz"], conf=args.conf, iou=args.iou, device=args.device,
+        manifest=manifest, split=args.split, raw_cache=args.raw_cache,
+        batch=s["batch"], threads=s["threads"], workers=s["workers"])
+    profiling.finish()
+
+if __name__ == "__main__":
+    main()
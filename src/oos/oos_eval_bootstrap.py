@@ -0,0 +1,139 @@
+
+import json, argparse, os, random
+from . import profiling
+from ._lazy import lazy_import
+from .subset_qc_tools import load_manifest
+
+np = lazy_import("numpy")
+
+def iou(boxA, boxB):
+    xA = max(boxA[0], boxB[0]); yA = max(boxA[1], boxB[1])
+    xB = min(boxA[2], boxB[2]); yB = min(boxA[3], boxB[3])
+    inter = max(0, xB - xA) * max(0, yB - yA)
+    if inter <= 0: 
+        return 0.0
+    areaA = max(0, boxA[2]-boxA[0]) * max(0, boxA[3]-boxA[1])
+    areaB = max(0, boxB[2]-boxB[0]) * max(0, boxB[3]-boxB[1])
+    denom = areaA + areaB - inter
+    return inter/denom if denom>0 else 0.0
+
+def precision_recall(pred, gt, iou_thr=0.3):
+    tp = 0; fp = 0; fn = 0
+    for img, pred_boxes in pred.items():
+        p = [list(map(float,b)) for b in pred_boxes]
+        g = [list(map(float,b)) for b in gt.get(img, [])]
+        matched = set()
+        for pb in p:
+            best = -1; best_iou = 0.0
+            for j, gb in enumerate(g):
+                if j in matched: 
+                    continue
+                iou_val = iou(pb, gb)
+                if iou_val > best_iou:
+                    best_iou = iou_val; best = j
+            if best_iou >= iou_thr:
+                tp += 1; matched.add(best)
+            else:
+                fp += 1
+        fn += (len(g) - len(matched))
+    prec = tp/(tp+fp) if (tp+fp)>0 else 0.0
+    rec  = tp/(tp+fn) if (tp+fn)>0 else 0.0
+    return prec, rec, tp, fp, fn
+
+def write_counts(counts, iou_thr, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"iou_thr": iou_thr, "images": counts}, f)
+    return path
+
+def image_counts(pred, gt, iou_thr=0.3):
+    """Per-image [tp, fp, fn, in_pred]; additive across images, so shards can be reduced exactly."""
+    counts = {}
+    for img in sorted(set(pred) | set(gt)):
+        _, _, tp, fp, fn = precision_recall({img: pred.get(img, [])}, gt, iou_thr=iou_thr)
+        counts[img] = [tp, fp, fn, int(img in pred)]
+    return counts
+
+def pr_from_counts(counts):
+    # the base metric only visits images present in pred (as precision_recall does)
+    tp = sum(c[0] for c in counts.values() if c[3]); fp = sum(c[1] for c in counts.values() if c[3])
+    fn = sum(c[2] for c in counts.values() if c[3])
+    prec = tp/(tp+fp) if (tp+fp)>0 else 0.0
+    rec  = tp/(tp+fn) if (tp+fn)>0 else 0.0
+    return prec, rec, tp, fp, fn
+
+def bootstrap_counts(counts, B=1000, seed=123):
+    """Bootstrap over images from per-image counts; same draws and results as resampling pred/gt."""
+    rng = np.random.default_rng(seed)
+    images = sorted(counts)
+    if not images:
+        return (0,0,0,0,0), (0,0), (0,0)
+    c = np.array([counts[img][:3] for img in images], dtype=np.int64)
+    pvals = []; rvals = []
+    for _ in range(B):
+        # a resampled image contributes once (the dict-based resample kept unique images)
+        idx = np.unique(rng.integers(0, len(images), size=len(images)))
+        tp, fp, fn = c[idx].sum(axis=0).tolist()
+        pvals.append(tp/(tp+fp) if (tp+fp)>0 else 0.0)
+        rvals.append(tp/(tp+fn) if (tp+fn)>0 else 0.0)
+    p_ci = (float(np.percentile(pvals, 2.5)), float(np.percentile(pvals, 97.5)))
+    r_ci = (float(np.percentile(rvals, 2.5)), float(np.percentile(rvals, 97.5)))
+    p_mean = float(np.mean(pvals)); r_mean = float(np.mean(rvals))
+    return (p_mean, r_mean), p_ci, r_ci
+
+def bootstrap_ci(pred, gt, iou_thr=0.3, B=1000, seed=123):
+    return bootstrap_counts(image_counts(pred, gt, iou_thr), B=B, seed=seed)
+
+def restrict(d, names):
+    return {k: v for k, v in d.items() if k in names}
+
+def print_report(prec, rec, tp, fp, fn, iou_thr, boot=None):
+    print(f"Base (all images): Precision={prec:.3f} Recall={rec:.3f}  TP={tp} FP={fp} FN={fn}  (IoU>={iou_thr})")
+    if boot is None:
+        return
+    (p_mean, r_mean), p_ci, r_ci = boot
+    print(f"Bootstrap means:   Precision={p_mean:.3f} Recall={r_mean:.3f}")
+    print(f"95% CI (Precision): [{p_ci[0]:.3f}, {p_ci[1]:.3f}]")
+    print(f"95% CI (Recall):    [{r_ci[0]:.3f}, {r_ci[1]:.3f}]")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Evaluate OOS predictions with precision/recall + bootstrap CIs.")
+    ap.add_argument("--pred_json", required=True, help="Predicted OOS JSON: {image: [[x1,y1,x2,y2], ...], ...}")
+    ap.add_argument("--gt_json", required=True, help="Ground-truth OOS JSON (same format)")
+    ap.add_argument("--iou_thr", type=float, default=0.3)
+    ap.add_argument("--bootstrap", type=int, default=1000, help="Bootstrap iterations")
+    ap.add_argument("--manifest", default="", help="Only evaluate images of this manifest split (e.g. a shard from `oos shard plan`)")
+    ap.add_argument("--split", default="test", help="Split to read from --manifest")
+    ap.add_argument("--counts_out", default="", help="Write per-image TP/FP/FN for `oos shard eval` and skip the bootstrap")
+    profiling.add_profile_args(ap)
+    args = ap.parse_args(argv)
+    profiling.start("oos_eval_bootstrap", args)
+
+    with profiling.stage("read_json"):
+        with open(args.pred_json, "r", encoding="utf-8") as f:
+            pred = json.load(f)
+        with open(args.gt_json, "r", encoding="utf-8") as f:
+            gt = json.load(f)
+    if args.manifest:
+        names = {os.path.basename(e) for e in load_manifest(args.manifest).get(args.split, [])}
+        pred, gt = restrict(pred, names), restrict(gt, names)
+    profiling.count("images", len(set(pred) | set(gt)))
+
+    with profiling.stage("image_counts"):
+        counts = image_counts(pred, gt, iou_thr=args.iou_thr)
+    prec, rec, tp, fp, fn = pr_from_counts(counts)
+    if args.counts_out:
+        with profiling.stage("write_counts"):
+            write_counts(counts, args.iou_thr, args.counts_out)
+        print_report(prec, rec, tp, fp, fn, args.iou_thr)
+        print(f"[OK] wrote per-image counts for {len(counts)} images to {args.counts_out}")
+        profiling.finish()
+        return
+    with profiling.stage("bootstrap_ci"):
+        boot = bootstrap_counts(counts, B=args.bootstrap)
+    profiling.count("bootstrap_iterations", args.bootstrap)
+    print_report(prec, rec, tp, fp, fn, args.iou_thr, boot)
+    profiling.finish()
+
+if __name__ == "__main__":
+    main()
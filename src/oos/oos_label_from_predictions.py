@@ -1,5 +1,6 @@
 
-import argparse, json, os, sys, csv
+import argparse, json, sys
+from .annotation_store import AnnotationStore, default_store_path
 
 HELP = """
 Prediction Reviewer (No-GUI)
@@ -25,26 +26,12 @@ def load_pred(json_path):
     with open(json_path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def overwrite_for_image(csv_path, filename, rows):
-    """Replace rows for 'filename' in CSV with 'rows' (list of [fn,x1,y1,x2,y2])."""
-    existing = []
-    if os.path.exists(csv_path):
-        with open(csv_path, "r", encoding="utf-8", newline="") as f:
-            rdr = csv.reader(f)
-            for r in rdr:
-                if r and len(r) >= 5:
-                    existing.append(r)
-    keep = [r for r in existing if r[0] != filename]
-    with open(csv_path, "w", encoding="utf-8", newline="") as f:
-        w = csv.writer(f)
-        for r in keep: w.writerow(r)
-        for r in rows: w.writerow(r)
-
-def main():
+def main(argv=None):
     ap = argparse.ArgumentParser(description="Keyboard-only OOS acceptance tool from predictions JSON.")
     ap.add_argument("--pred_json", required=True, help=r"e.g., outputs\oos_vis_main\oos_regions.json")
     ap.add_argument("--out_csv", required=True, help=r"e.g., data\oos_gt_main.csv")
-    args = ap.parse_args()
+    ap.add_argument("--store", default="", help="Annotation store (default: <out_csv>.sqlite); CSV is exported from it on quit/done")
+    args = ap.parse_args(argv)
 
     data = load_pred(args.pred_json)  # {filename: [[x1,y1,x2,y2], ...], ...}
     files = sorted(data.keys())
@@ -52,6 +39,8 @@ def main():
         print("No predictions found in:", args.pred_json)
         sys.exit(1)
 
+    # per-image saves go to the indexed store; the CSV is exported once at the end
+    store = AnnotationStore(args.store or default_store_path(args.out_csv), seed_csv=args.out_csv)
     print(HELP)
     idx = 0
 
@@ -81,20 +70,21 @@ def main():
             elif ch == "r":
                 i = len(boxes)
             elif ch == "s":
-                overwrite_for_image(args.out_csv, fn, accepted)
+                store.upsert_rows(fn, accepted)
                 print(f"  [SAVED partial] {fn} rows={len(accepted)} -> {args.out_csv}")
             elif ch == "":
-                overwrite_for_image(args.out_csv, fn, accepted)
+                store.upsert_rows(fn, accepted)
                 print(f"  [NEXT] saved {fn} rows={len(accepted)} -> {args.out_csv}")
                 break
             elif ch == "b":
-                overwrite_for_image(args.out_csv, fn, accepted)
+                store.upsert_rows(fn, accepted)
                 print(f"  [BACK] saved {fn} rows={len(accepted)} -> {args.out_csv}")
                 idx = max(0, idx-1)
                 break
             elif ch == "q":
-                overwrite_for_image(args.out_csv, fn, accepted)
+                store.upsert_rows(fn, accepted)
                 print(f"  [QUIT] saved {fn} rows={len(accepted)} -> {args.out_csv}")
+                store.export_csv(args.out_csv); store.close()
                 print("Bye.")
                 return
             elif ch == "h":
@@ -102,13 +92,14 @@ def main():
             else:
                 print("  (Unknown key. Use y/n/a/r/s/ENTER/b/q/h)")
         else:
-            overwrite_for_image(args.out_csv, fn, accepted)
+            store.upsert_rows(fn, accepted)
             print(f"  [AUTO-NEXT] saved {fn} rows={len(accepted)} -> {args.out_csv}")
         idx += 1
 
+    store.export_csv(args.out_csv); store.close()
     print("\n[Done] Reached last image.")
     print("Convert CSV to JSON:")
-    print(r"  python scripts\csv_to_oos_gt.py --csv_path data\oos_gt_main.csv --images_dir data\sku110k_subset_strat\images\test --out_json data\oos_gt_main.json")
+    print(r"  oos csv2gt --csv_path data\oos_gt_main.csv --images_dir data\sku110k_subset_strat\images\test --out_json data\oos_gt_main.json")
 
 if __name__ == "__main__":
     main()
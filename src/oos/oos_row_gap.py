@@ -1,6 +1,10 @@
 
 import argparse, json, os, glob, math
-from PIL import Image, ImageDraw
+from . import profiling, image_pack
+from ._lazy import lazy_import
+from .subset_qc_tools import load_manifest, split_images
+
+ImageDraw = lazy_import("PIL.ImageDraw")
 
 def group_rows(boxes, row_tol_px):
     # boxes: list of [x1,y1,x2,y2]
@@ -43,7 +47,13 @@ def gaps_in_row(row_boxes, gap_factor=1.4, min_abs_gap=10):
     return gaps
 
 def draw_boxes(image_path, product_boxes, gap_boxes, out_path):
-    with Image.open(image_path) as im:
+    with image_pack.open_pil(image_path) as im:
+        W, H = image_pack.image_size(image_path)
+        if im.size != (W, H):
+            # pre-resized pack entry: draw in its own pixel grid
+            sx, sy = im.size[0] / float(W), im.size[1] / float(H)
+            product_boxes = [[b[0]*sx, b[1]*sy, b[2]*sx, b[3]*sy] for b in product_boxes]
+            gap_boxes = [[b[0]*sx, b[1]*sy, b[2]*sx, b[3]*sy] for b in gap_boxes]
         draw = ImageDraw.Draw(im, "RGBA")
         for x1,y1,x2,y2 in product_boxes:
             draw.rectangle([x1,y1,x2,y2], outline=(0,255,0,200), width=2)
@@ -53,7 +63,7 @@ def draw_boxes(image_path, product_boxes, gap_boxes, out_path):
         os.makedirs(os.path.dirname(out_path), exist_ok=True)
         im.save(out_path)
 
-def main():
+def main(argv=None):
     ap = argparse.ArgumentParser(description="Compute OOS regions (gaps) from detection JSON and visualize.")
     ap.add_argument("--detections_json", required=True, help="detections JSON from infer_yolo.py")
     ap.add_argument("--images_dir", required=True, help="images root used for detections")
@@ -62,39 +72,57 @@ def main():
     ap.add_argument("--gap_factor", type=float, default=1.4, help="gap must be >= gap_factor * median box width")
     ap.add_argument("--min_abs_gap", type=float, default=10, help="absolute minimum gap in pixels")
     ap.add_argument("--max_vis", type=int, default=1000, help="limit number of images to visualize (0=off)")
-    args = ap.parse_args()
+    ap.add_argument("--manifest", default="", help="Subset manifest; --images_dir is then the subset root")
+    ap.add_argument("--split", default="test", help="Split to read from --manifest")
+    profiling.add_profile_args(ap)
+    args = ap.parse_args(argv)
+    profiling.start("oos_row_gap", args)
 
-    with open(args.detections_json, "r", encoding="utf-8") as f:
-        det = json.load(f)
+    with profiling.stage("read_json"):
+        with open(args.detections_json, "r", encoding="utf-8") as f:
+            det = json.load(f)
+    src_paths = {}
+    if args.manifest:
+        # virtual split / shard: only its images, which may live under another split's directory
+        src_paths = {os.path.basename(p): p for p in split_images(args.images_dir, args.split, load_manifest(args.manifest))}
+        det = {k: v for k, v in det.items() if k in src_paths}
 
     oos = {}
     for fname, boxes in det.items():
         # group rows
-        rows = group_rows(boxes, row_tol_px=args.row_tol_px)
+        with profiling.stage("group_rows"):
+            rows = group_rows(boxes, row_tol_px=args.row_tol_px)
         gap_boxes = []
-        for r in rows:
-            row_boxes = [boxes[i] for i in r["idxs"]]
-            gap_boxes += gaps_in_row(row_boxes, gap_factor=args.gap_factor, min_abs_gap=args.min_abs_gap)
+        with profiling.stage("gaps_in_row"):
+            for r in rows:
+                row_boxes = [boxes[i] for i in r["idxs"]]
+                gap_boxes += gaps_in_row(row_boxes, gap_factor=args.gap_factor, min_abs_gap=args.min_abs_gap)
         oos[fname] = gap_boxes
+        profiling.count("images"); profiling.count("boxes", len(boxes))
+        profiling.count("rows", len(rows)); profiling.count("gaps", len(gap_boxes))
 
     # write global oos json
     os.makedirs(args.out_dir, exist_ok=True)
     out_json = os.path.join(args.out_dir, "oos_regions.json")
-    with open(out_json, "w", encoding="utf-8") as f:
-        json.dump(oos, f)
+    with profiling.stage("write_json"):
+        with open(out_json, "w", encoding="utf-8") as f:
+            json.dump(oos, f)
     print(f"[OK] wrote OOS JSON for {len(oos)} images to {out_json}")
 
     # visuals
     if args.max_vis != 0:
         count = 0
         for fname, boxes in det.items():
-            img_path = os.path.join(args.images_dir, fname)
+            img_path = src_paths.get(fname) or os.path.join(args.images_dir, fname)
             vis_path = os.path.join(args.out_dir, fname)
-            draw_boxes(img_path, boxes, oos.get(fname, []), vis_path)
+            with profiling.stage("draw"):
+                draw_boxes(img_path, boxes, oos.get(fname, []), vis_path)
             count += 1
             if args.max_vis > 0 and count >= args.max_vis:
                 break
         print(f"[OK] wrote {count} visualizations to {args.out_dir}")
+        profiling.count("visualized", count)
+    profiling.finish()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,167 @@
+import os, json, argparse
+from concurrent.futures import ProcessPoolExecutor
+from ._lazy import lazy_import
+from .subset_qc_tools import load_manifest, split_images
+
+Image = lazy_import("PIL.Image")
+
+SPLITS = ("train", "val", "test")
+
+def dhash(path, hash_size=8):
+    """64-bit difference hash; JPEGs are decoded at reduced scale via PIL draft mode."""
+    with Image.open(path) as im:
+        # draft lets the JPEG decoder skip straight to a 1/2..1/8 scale in grayscale
+        im.draft("L", (hash_size * 8, hash_size * 8))
+        im = im.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+        px = list(im.getdata())
+    h = 0
+    for y in range(hash_size):
+        row = px[y * (hash_size + 1):(y + 1) * (hash_size + 1)]
+        for a, b in zip(row, row[1:]):
+            h = (h << 1) | (1 if b > a else 0)
+    return h
+
+def _hash_job(path):
+    try:
+        return path, dhash(path)
+    except Exception:
+        return path, None
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+def load_index(path):
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        for e in index["entries"].values():
+            if isinstance(e[0], str):
+                e[0] = [e[0]]  # older indexes stored a single split per path
+        return index
+    return {"hash_bits": 64, "entries": {}}
+
+def save_index(index, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+
+def update_index(index, split_paths, workers=None):
+    """Hash new/changed images only; entries are keyed by path with [splits, hex, mtime, size].
+
+    A virtual manifest can list one physical file under several splits, so splits is a list.
+    """
+    entries = index["entries"]
+    splits_of = {}
+    for split, paths in split_paths.items():
+        for p in paths:
+            splits_of.setdefault(p, []).append(split)
+    todo = []
+    for p, splits in splits_of.items():
+        try:
+            st = os.stat(p)
+        except OSError:
+            continue
+        old = entries.get(p)
+        if old and old[2] == st.st_mtime and old[3] == st.st_size:
+            old[0] = splits
+            continue
+        entries[p] = [splits, None, st.st_mtime, st.st_size]
+        todo.append(p)
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            for p, h in ex.map(_hash_job, todo, chunksize=64):
+                if h is None:
+                    entries.pop(p, None)
+                else:
+                    entries[p][1] = f"{h:016x}"
+    # drop entries for files no longer part of any split
+    for p in [p for p in entries if p not in splits_of]:
+        del entries[p]
+    return len(todo)
+
+class MultiIndexHash:
+    """Multi-index hashing: split each 64-bit hash into radius+1 chunks.
+
+    By pigeonhole, two hashes within Hamming distance `radius` agree exactly on
+    at least one chunk, so a query only verifies items sharing a chunk value.
+    """
+    def __init__(self, radius, bits=64):
+        m = radius + 1
+        step = -(-bits // m)
+        self.radius = radius
+        self.spans = [(s, min(step, bits - s)) for s in range(0, bits, step)]
+        self.tables = [{} for _ in self.spans]
+        self.items = []
+
+    def _keys(self, h):
+        return [(h >> s) & ((1 << w) - 1) for s, w in self.spans]
+
+    def add(self, h, payload):
+        i = len(self.items)
+        self.items.append((h, payload))
+        for t, k in zip(self.tables, self._keys(h)):
+            t.setdefault(k, []).append(i)
+
+    def query(self, h):
+        seen = set()
+        for t, k in zip(self.tables, self._keys(h)):
+            for i in t.get(k, ()):
+                if i in seen:
+                    continue
+                seen.add(i)
+                d = hamming(h, self.items[i][0])
+                if d <= self.radius:
+                    yield self.items[i][1], d
+
+def find_leaks(entries, radius=4, same_split=False):
+    mih = MultiIndexHash(radius)
+    pairs = []
+    # insert-then-query so each unordered pair is reported exactly once
+    for p in sorted(entries):
+        splits, hx = entries[p][0], entries[p][1]
+        # the same file listed under several splits is the plainest leak of all
+        for i, a in enumerate(splits):
+            for b in splits[i + 1:]:
+                pairs.append({"a": p, "split_a": a, "b": p, "split_b": b, "dist": 0})
+        h = int(hx, 16)
+        for (q, qsplits), d in mih.query(h):
+            for qs in qsplits:
+                for s in splits:
+                    if same_split or qs != s:
+                        pairs.append({"a": q, "split_a": qs, "b": p, "split_b": s, "dist": d})
+        mih.add(h, (p, splits))
+    return pairs
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Perceptual-hash index for near-duplicate and cross-split leakage detection.")
+    ap.add_argument("--root", required=True, help=r"Subset root (e.g., data\sku110k_subset_strat)")
+    ap.add_argument("--manifest_in", default="", help="Optional manifest defining (virtual) splits")
+    ap.add_argument("--index", default="outputs/phash_index.json", help="Persistent hash index (reused across runs)")
+    ap.add_argument("--radius", type=int, default=4, help="Max Hamming distance (of 64 bits) to call a near-duplicate")
+    ap.add_argument("--same_split", action="store_true", help="Also report near-duplicates inside a split")
+    ap.add_argument("--workers", type=int, default=None, help="Hashing processes (default: CPU count)")
+    ap.add_argument("--out_json", default="outputs/phash_leaks.json", help="Where to write the leaking pairs")
+    args = ap.parse_args(argv)
+
+    manifest = load_manifest(args.manifest_in) if args.manifest_in else None
+    split_paths = {s: split_images(args.root, s, manifest) for s in SPLITS}
+
+    index = load_index(args.index)
+    n_new = update_index(index, split_paths, args.workers)
+    save_index(index, args.index)
+    print(f"[OK] hashed {n_new} new/changed images; index has {len(index['entries'])} -> {args.index}")
+
+    pairs = find_leaks(index["entries"], radius=args.radius, same_split=args.same_split)
+    os.makedirs(os.path.dirname(args.out_json) or ".", exist_ok=True)
+    with open(args.out_json, "w", encoding="utf-8") as f:
+        json.dump(pairs, f, indent=2)
+    by_kind = {}
+    for pr in pairs:
+        k = "-".join(sorted((pr["split_a"], pr["split_b"])))
+        by_kind[k] = by_kind.get(k, 0) + 1
+    for k, n in sorted(by_kind.items()):
+        print(f"  {k}: {n} pairs")
+    print(f"[OK] {len(pairs)} near-duplicate pairs (dist<={args.radius}) -> {args.out_json}")
+
+if __name__ == "__main__":
+    main()
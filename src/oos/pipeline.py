@@ -0,0 +1,343 @@
+import os, sys, ast, json, time, shutil, hashlib, argparse, subprocess
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from .cli import COMMANDS, ALIASES
+from .remap_subset_split import place_file
+from .autotune import profile_path
+
+# commands that read the `oos autotune` profile for settings not passed explicitly
+TUNED_COMMANDS = ("infer", "cascade")
+
+HELP_CONFIG = """
+Config (JSON):
+{
+  "cache_dir": "outputs/.pipeline",
+  "stages": {
+    "detect": {"command": "infer",
+               "inputs":  {"weights": "models/best.pt", "images_dir": "data/test"},
+               "params":  {"imgsz": 640, "conf": 0.25},
+               "outputs": {"out_json": "detections.json"}},
+    "gaps":   {"command": "gaps",
+               "inputs":  {"detections_json": "@detect.out_json", "images_dir": "data/test"},
+               "params":  {"gap_factor": 1.4, "max_vis": 0},
+               "outputs": {"out_dir": "gaps"},
+               "publish": {"out_dir": "outputs/oos_vis_main"}},
+    "eval":   {"command": "eval",
+               "inputs":  {"pred_json": "@gaps.out_dir/oos_regions.json", "gt_json": "data/oos_gt_main.json"},
+               "params":  {"bootstrap": 1000}}
+  }
+}
+inputs are files/dirs (hashed by content) or "@stage.output[/subpath]" references;
+params are plain CLI options (true -> bare flag, false/null -> omitted);
+outputs name files/dirs created inside the stage's cached artifact dir;
+publish copies (hardlinks) an output to a stable path after the stage is up to date.
+"""
+
+def sha256_file(path, chunk=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for b in iter(lambda: f.read(chunk), b""):
+            h.update(b)
+    return h.hexdigest()
+
+class FileHashes:
+    """Content digests memoised by (size, mtime_ns) so unchanged files are never re-read."""
+    def __init__(self, path):
+        self.path = path
+        self.memo = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.memo = json.load(f)
+
+    def file(self, p):
+        st = os.stat(p)
+        key = os.path.abspath(p)
+        hit = self.memo.get(key)
+        if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+            return hit[2]
+        d = sha256_file(p)
+        self.memo[key] = [st.st_size, st.st_mtime_ns, d]
+        return d
+
+    def path_digest(self, p):
+        if os.path.isfile(p):
+            return self.file(p)
+        if os.path.isdir(p):
+            h = hashlib.sha256()
+            for root, dirs, files in os.walk(p):
+                dirs.sort()
+                for fn in sorted(files):
+                    fp = os.path.join(root, fn)
+                    h.update(os.path.relpath(fp, p).replace(os.sep, "/").encode())
+                    h.update(self.file(fp).encode())
+            return h.hexdigest()
+        raise SystemExit(f"[ERROR] pipeline input not found: {p}")
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.memo, f)
+        os.replace(tmp, self.path)
+
+def parse_ref(value):
+    # "@stage.output/sub/path" -> ("stage", "output", "sub/path")
+    ref = value[1:]
+    head, _, sub = ref.partition("/")
+    stage, _, out = head.partition(".")
+    return stage, out, sub
+
+def stage_deps(st):
+    return sorted({parse_ref(v)[0] for v in st.get("inputs", {}).values()
+                   if isinstance(v, str) and v.startswith("@")})
+
+def topo_order(stages):
+    order, state = [], {}
+    def visit(name, trail):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "active":
+            raise SystemExit(f"[ERROR] pipeline cycle: {' -> '.join(trail + [name])}")
+        if name not in stages:
+            raise SystemExit(f"[ERROR] unknown stage referenced: {name}")
+        state[name] = "active"
+        for d in stage_deps(stages[name]):
+            visit(d, trail + [name])
+        state[name] = "done"
+        order.append(name)
+    for name in stages:
+        visit(name, [])
+    return order
+
+def package_imports(path):
+    """Names of package modules imported anywhere in a module (top level or inside functions)."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom):
+            parts = (node.module or "").split(".")
+            if node.level == 1:
+                names |= {parts[0]} if node.module else {a.name for a in node.names}
+            elif node.level == 0 and parts[0] == __package__:
+                names |= {parts[1]} if len(parts) > 1 else {a.name for a in node.names}
+        elif isinstance(node, ast.Import):
+            names |= {a.name.split(".")[1] for a in node.names if a.name.startswith(__package__ + ".")}
+    return names
+
+def code_digest(command):
+    """Digest of the command's module plus every package module it (transitively) imports."""
+    pkg_dir = os.path.dirname(os.path.abspath(__file__))
+    todo, seen = [COMMANDS[ALIASES.get(command, command)][0]], set()
+    while todo:
+        mod = todo.pop()
+        path = os.path.join(pkg_dir, mod + ".py")
+        if mod in seen or not os.path.isfile(path):
+            continue  # not a module file (e.g. a name imported from the package __init__)
+        seen.add(mod)
+        todo += package_imports(path)
+    h = hashlib.sha256()
+    for mod in sorted(seen):
+        h.update(f"{mod}:{sha256_file(os.path.join(pkg_dir, mod + '.py'))}".encode())
+    return h.hexdigest()
+
+def to_argv(options):
+    argv = []
+    for k, v in options.items():
+        if v is None or v is False:
+            continue
+        argv.append(f"--{k}")
+        if v is not True:
+            argv.append(str(v))
+    return argv
+
+class Pipeline:
+    def __init__(self, config, config_dir="."):
+        self.stages = config["stages"]
+        self.base = config_dir
+        self.cache_dir = self._abs(config.get("cache_dir", "outputs/.pipeline"))
+        self.hashes = FileHashes(os.path.join(self.cache_dir, "file_hashes.json"))
+        self.order = topo_order(self.stages)
+        self.keys = {}
+
+    def _abs(self, p):
+        return p if os.path.isabs(p) else os.path.normpath(os.path.join(self.base, p))
+
+    def artifact_dir(self, name):
+        return os.path.join(self.cache_dir, "artifacts", f"{name}-{self.keys[name][:16]}")
+
+    def resolve(self, value):
+        if isinstance(value, str) and value.startswith("@"):
+            stage, out, sub = parse_ref(value)
+            outs = self.stages[stage].get("outputs", {})
+            if out not in outs:
+                raise SystemExit(f"[ERROR] {value}: stage '{stage}' has no output '{out}'")
+            p = os.path.join(self.artifact_dir(stage), outs[out])
+            return os.path.join(p, sub) if sub else p
+        return self._abs(str(value))
+
+    def compute_key(self, name):
+        st = self.stages[name]
+        h = hashlib.sha256()
+        desc = {"command": ALIASES.get(st["command"], st["command"]), "params": st.get("params", {}),
+                "outputs": st.get("outputs", {}), "code": code_digest(st["command"]), "inputs": {}}
+        if desc["command"] in TUNED_COMMANDS and not st.get("params", {}).get("no_tuned"):
+            # the tuned profile can change imgsz (and so the detections) without any param changing
+            prof = profile_path()
+            desc["tuned_profile"] = sha256_file(prof) if os.path.isfile(prof) else None
+        for k, v in sorted(st.get("inputs", {}).items()):
+            if isinstance(v, str) and v.startswith("@"):
+                # hash what the upstream stage actually produced, not its key: a param that
+                # doesn't change the artifact (e.g. max_vis) must not invalidate dependents
+                desc["inputs"][k] = ["ref", self.hashes.path_digest(self.resolve(v))]
+            else:
+                desc["inputs"][k] = ["path", self.hashes.path_digest(self.resolve(v))]
+        h.update(json.dumps(desc, sort_keys=True).encode())
+        return h.hexdigest()
+
+    def is_cached(self, name):
+        return os.path.exists(os.path.join(self.artifact_dir(name), ".done"))
+
+    def argv(self, name, workdir):
+        st = self.stages[name]
+        opts = {k: self.resolve(v) for k, v in st.get("inputs", {}).items()}
+        opts.update(st.get("params", {}))
+        opts.update({k: os.path.join(workdir, v) for k, v in st.get("outputs", {}).items()})
+        return [ALIASES.get(st["command"], st["command"])] + to_argv(opts)
+
+    def run_stage(self, name):
+        final = self.artifact_dir(name)
+        tmp = final + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        argv = self.argv(name, tmp)
+        env = dict(os.environ)
+        pkg_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env["PYTHONPATH"] = pkg_root + os.pathsep + env.get("PYTHONPATH", "")
+        t0 = time.perf_counter()
+        with open(os.path.join(tmp, "log.txt"), "w", encoding="utf-8") as log:
+            rc = subprocess.run([sys.executable, "-m", __package__] + argv, stdout=log,
+                                stderr=subprocess.STDOUT, env=env).returncode
+        dt = time.perf_counter() - t0
+        if rc != 0:
+            return name, rc, dt, os.path.join(tmp, "log.txt")
+        with open(os.path.join(tmp, ".done"), "w", encoding="utf-8") as f:
+            json.dump({"stage": name, "key": self.keys[name], "argv": argv, "seconds": dt}, f, indent=2)
+        # outputs point into the final dir, so rename only after the command finished
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+        return name, 0, dt, os.path.join(final, "log.txt")
+
+    def publish(self, name):
+        for out, dst in self.stages[name].get("publish", {}).items():
+            src = os.path.join(self.artifact_dir(name), self.stages[name]["outputs"][out])
+            dst = self._abs(dst)
+            if os.path.isdir(src):
+                # start from an empty target so files the new artifact no longer has don't linger
+                if os.path.islink(dst) or os.path.isfile(dst):
+                    os.remove(dst)
+                shutil.rmtree(dst, ignore_errors=True)
+                for root, _, files in os.walk(src):
+                    rel = os.path.relpath(root, src)
+                    os.makedirs(os.path.join(dst, rel), exist_ok=True)
+                    for fn in files:
+                        place_file(os.path.join(root, fn), os.path.join(dst, rel, fn), "hardlink")
+            else:
+                os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+                place_file(src, dst, "hardlink")
+
+    def prune(self, status):
+        """Delete outdated artifact dirs of stages that are now cached/ran (`run`'s status); returns how many."""
+        root = os.path.join(self.cache_dir, "artifacts")
+        if not os.path.isdir(root):
+            return 0
+        n = 0
+        for d in os.listdir(root):
+            stage, _, key = d.rpartition("-")
+            if key.endswith(".tmp"):
+                stage, key = d[:-4].rpartition("-")[0], None  # leftover from an interrupted run
+            # a failed or skipped stage keeps its last good artifact
+            if status.get(stage) in ("cached", "ran") and (key is None or key != self.keys[stage][:16]):
+                shutil.rmtree(os.path.join(root, d), ignore_errors=True); n += 1
+        return n
+
+    def run(self, jobs=2, force=(), dry_run=False):
+        """Run stale stages (respecting deps, up to `jobs` at once); returns {stage: status}."""
+        status = {}
+        pending = list(self.order)
+        running = {}
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as ex:
+            while pending or running:
+                progressed = False
+                for name in list(pending):
+                    deps = stage_deps(self.stages[name])
+                    if any(status.get(d) == "failed" or status.get(d) == "skipped-upstream" for d in deps):
+                        status[name] = "skipped-upstream"; pending.remove(name); progressed = True
+                        print(f"[SKIP] {name}: upstream failed")
+                        continue
+                    if not all(status.get(d) in ("cached", "ran", "would-run") for d in deps):
+                        continue
+                    pending.remove(name); progressed = True
+                    if any(status[d] == "would-run" for d in deps):
+                        # dry run: upstream output does not exist yet, so the key is unknown
+                        self.keys[name] = "0" * 64
+                        status[name] = "would-run"
+                        print(f"[DRY] {name}: would run (upstream changes)")
+                        continue
+                    self.keys[name] = self.compute_key(name)
+                    if name not in force and self.is_cached(name):
+                        status[name] = "cached"
+                        self.publish(name)
+                        print(f"[CACHED] {name} ({self.keys[name][:12]})")
+                    elif dry_run:
+                        status[name] = "would-run"
+                        print(f"[DRY] {name}: would run ({self.keys[name][:12]})")
+                    else:
+                        print(f"[RUN] {name} ({self.keys[name][:12]})")
+                        running[ex.submit(self.run_stage, name)] = name
+                if running and not progressed:
+                    done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        name, rc, dt, log = fut.result()
+                        del running[fut]
+                        if rc == 0:
+                            status[name] = "ran"
+                            self.publish(name)
+                            print(f"[OK] {name} in {dt:.1f}s -> {self.artifact_dir(name)}")
+                        else:
+                            status[name] = "failed"
+                            print(f"[FAIL] {name} exit={rc} (log: {log})")
+                elif not running and not progressed and pending:
+                    raise SystemExit(f"[ERROR] stages cannot be scheduled: {pending}")
+        self.hashes.save()
+        return status
+
+def load_config(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run a DAG of oos commands from a JSON config, skipping stages whose inputs/params are unchanged.",
+                                 epilog=HELP_CONFIG, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--config", required=True, help="Pipeline JSON (see below)")
+    ap.add_argument("--jobs", type=int, default=2, help="Max stages running at once")
+    ap.add_argument("--force", default="", help="Comma-separated stages to rerun even if cached")
+    ap.add_argument("--dry_run", action="store_true", help="Only report which stages would run")
+    ap.add_argument("--keep_old", action="store_true", help="Keep artifacts of outdated keys (default: prune them)")
+    args = ap.parse_args(argv)
+
+    cfg = load_config(args.config)
+    pipe = Pipeline(cfg, os.path.dirname(os.path.abspath(args.config)))
+    force = set(s for s in args.force.split(",") if s)
+    status = pipe.run(jobs=args.jobs, force=force, dry_run=args.dry_run)
+    if not args.dry_run and not args.keep_old:
+        n = pipe.prune(status)
+        if n:
+            print(f"[OK] pruned {n} outdated artifact dirs")
+    counts = {}
+    for s in status.values():
+        counts[s] = counts.get(s, 0) + 1
+    print("[DONE] " + "  ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+    return 1 if any(s in ("failed", "skipped-upstream") for s in status.values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
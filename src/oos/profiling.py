@@ -0,0 +1,196 @@
+import os, sys, json, time, atexit, bisect
+from contextlib import contextmanager
+
+# Prometheus-style upper bounds (seconds); the last bucket is +Inf
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class _Null:
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+
+_NULL = _Null()
+_active = None  # the running Profiler, or None when --profile is off
+
+class StageHist:
+    """Bounded wall-time histogram: bucket counts plus count/sum/min/max."""
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, dt):
+        self.buckets[bisect.bisect_left(BUCKETS, dt)] += 1
+        self.count += 1
+        self.sum += dt
+        if dt < self.min: self.min = dt
+        if dt > self.max: self.max = dt
+
+    def quantile(self, q):
+        # upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        acc = 0
+        for i, n in enumerate(self.buckets):
+            acc += n
+            if acc >= target:
+                return BUCKETS[i] if i < len(BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count, "total_s": self.sum,
+            "mean_s": self.sum / self.count if self.count else 0.0,
+            "min_s": self.min if self.count else 0.0, "max_s": self.max,
+            "p50_s": self.quantile(0.5), "p95_s": self.quantile(0.95),
+            "buckets": {("+Inf" if i == len(BUCKETS) else str(BUCKETS[i])): n for i, n in enumerate(self.buckets)},
+        }
+
+def peak_rss_bytes():
+    try:
+        import resource
+    except ImportError:
+        # Windows: no resource module; psutil only if it happens to be installed
+        try:
+            import psutil
+            mi = psutil.Process().memory_info()
+            return int(getattr(mi, "peak_wset", mi.rss))
+        except Exception:
+            return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(rss if sys.platform == "darwin" else rss * 1024)  # macOS reports bytes, Linux KiB
+
+class Profiler:
+    def __init__(self, tool, out_path, sampler=""):
+        self.tool = tool
+        self.out_path = out_path
+        self.stages = {}
+        self.counters = {}
+        self.t0 = time.perf_counter()
+        self.sampler = None
+        if sampler:
+            self.sampler = _start_sampler(sampler)
+
+    @contextmanager
+    def stage(self, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            h = self.stages.get(name)
+            if h is None:
+                h = self.stages[name] = StageHist()
+            h.observe(time.perf_counter() - t)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self):
+        return {
+            "tool": self.tool,
+            "wall_s": time.perf_counter() - self.t0,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "stages": {k: h.to_dict() for k, h in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+
+    def write(self):
+        rep = self.report()
+        os.makedirs(os.path.dirname(self.out_path) or ".", exist_ok=True)
+        _write_atomic(self.out_path, json.dumps(rep, indent=2))
+        # node-exporter may scrape at any moment: never expose a half-written textfile
+        prom = os.path.splitext(self.out_path)[0] + ".prom"
+        _write_atomic(prom, to_prometheus(self))
+        if self.sampler is not None:
+            _stop_sampler(self.sampler, os.path.splitext(self.out_path)[0])
+        return self.out_path, prom
+
+def _write_atomic(path, text):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+def to_prometheus(prof):
+    """Node-exporter textfile format."""
+    t = prof.tool
+    out = ["# HELP oos_stage_seconds Wall time per pipeline stage.",
+           "# TYPE oos_stage_seconds histogram"]
+    for name, h in sorted(prof.stages.items()):
+        lab = f'tool="{t}",stage="{name}"'
+        acc = 0
+        for i, n in enumerate(h.buckets):
+            acc += n
+            le = "+Inf" if i == len(BUCKETS) else repr(BUCKETS[i])
+            out.append(f'oos_stage_seconds_bucket{{{lab},le="{le}"}} {acc}')
+        out.append(f"oos_stage_seconds_sum{{{lab}}} {h.sum:.6f}")
+        out.append(f"oos_stage_seconds_count{{{lab}}} {h.count}")
+    out += ["# HELP oos_items_total Items processed per counter.", "# TYPE oos_items_total counter"]
+    for name, n in sorted(prof.counters.items()):
+        out.append(f'oos_items_total{{tool="{t}",name="{name}"}} {n}')
+    rss = peak_rss_bytes()
+    if rss is not None:
+        out += ["# HELP oos_peak_rss_bytes Peak resident set size.", "# TYPE oos_peak_rss_bytes gauge",
+                f'oos_peak_rss_bytes{{tool="{t}"}} {rss}']
+    out += ["# HELP oos_run_wall_seconds Wall time of the whole run.", "# TYPE oos_run_wall_seconds gauge",
+            f'oos_run_wall_seconds{{tool="{t}"}} {time.perf_counter() - prof.t0:.6f}']
+    return "\n".join(out) + "\n"
+
+def _start_sampler(kind):
+    if kind == "pyinstrument":
+        try:
+            from pyinstrument import Profiler as PyiProfiler
+        except ImportError:
+            print("[WARN] pyinstrument not installed; falling back to cProfile")
+        else:
+            p = PyiProfiler(); p.start()
+            return ("pyinstrument", p)
+    import cProfile
+    p = cProfile.Profile(); p.enable()
+    return ("cprofile", p)
+
+def _stop_sampler(sampler, base):
+    kind, p = sampler
+    if kind == "pyinstrument":
+        p.stop()
+        with open(base + ".html", "w", encoding="utf-8") as f:
+            f.write(p.output_html())
+    else:
+        p.disable()
+        p.dump_stats(base + ".pstats")
+
+# -- module-level API used by the CLIs ----------------------------------------
+
+def add_profile_args(ap):
+    ap.add_argument("--profile", default="", help="Write per-stage timing/counters/peak RSS JSON here (+ .prom textfile)")
+    ap.add_argument("--profile_sampler", default="", choices=("", "pyinstrument", "cprofile"),
+                    help="Also run a profiler for the whole run (pyinstrument -> .html, cprofile -> .pstats)")
+
+def start(tool, args):
+    """Enable profiling if args.profile is set; otherwise stage()/count() stay no-ops."""
+    global _active
+    if getattr(args, "profile", ""):
+        _active = Profiler(tool, args.profile, getattr(args, "profile_sampler", ""))
+        # failed or early-exiting runs still leave a profile; finish() is a no-op once it has run
+        atexit.register(finish)
+    return _active
+
+def stage(name):
+    return _NULL if _active is None else _active.stage(name)
+
+def count(name, n=1):
+    if _active is not None:
+        _active.count(name, n)
+
+def finish():
+    global _active
+    if _active is None:
+        return None
+    paths = _active.write()
+    print(f"[PROFILE] {paths[0]} | {paths[1]}")
+    _active = None
+    return paths
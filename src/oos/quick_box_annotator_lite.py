@@ -1,6 +1,13 @@
 
-import argparse, csv, glob, os, sys
-import cv2
+import argparse, os, sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from . import image_pack
+from ._lazy import lazy_import
+from .annotation_store import AnnotationStore, default_store_path
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
 
 HELP = """
 Quick Box Annotator (Lite)
@@ -23,40 +30,90 @@ Tip: Use --start_index and --pattern to jump within the folder.
 CSV format: filename,x1,y1,x2,y2  (one row per box, pixel coords on ORIGINAL image)
 """
 
-def overwrite_csv(csv_path, records):
-    # records: list of (filename, x1,y1,x2,y2) or [] if no boxes
-    keep = []
-    existing = []
-    if os.path.exists(csv_path):
-        with open(csv_path, "r", encoding="utf-8", newline="") as f:
-            rdr = csv.reader(f)
-            for row in rdr:
-                if row and len(row) >= 5:
-                    existing.append(row)
-    targets = set(r[0] for r in records) if records else set()
-    for row in existing:
-        if row[0] not in targets:
-            keep.append(row)
-    with open(csv_path, "w", encoding="utf-8", newline="") as f:
-        w = csv.writer(f)
-        for row in keep:
-            w.writerow(row)
-        for r in records:
-            w.writerow([r[0], int(r[1]), int(r[2]), int(r[3]), int(r[4])])
+def display_scale(h, w, max_side):
+    if max_side <= 0:
+        return 1.0
+    m = max(h, w)
+    if m <= max_side:
+        return 1.0
+    return float(max_side) / float(m)
+
+def load_display(path, max_side):
+    """Decode + resize for display. Returns (disp, scale) with scale = display px / original px."""
+    img = None
+    try:
+        # header-only read for the original size, so the decoder can be told to downscale
+        w, h = image_pack.image_size(path)
+        scale = display_scale(h, w, max_side)
+        flag = cv2.IMREAD_COLOR
+        for f, fl in image_pack.reduced_flags():
+            if max(h, w) / f >= max_side > 0:
+                flag = fl
+                break
+        img = image_pack.imread(path, flag)
+        if img is not None and h != w and (img.shape[0] > img.shape[1]) != (h > w):
+            # the decoder applied an EXIF rotation the header size doesn't reflect
+            w, h = h, w
+            scale = display_scale(h, w, max_side)
+    except Exception:
+        img = None
+    if img is None:
+        print("  [WARN] Failed to read:", path)
+        img = 255 * np.ones((720,1280,3), dtype=np.uint8)
+        h, w = img.shape[:2]
+        scale = display_scale(h, w, max_side)
+    tw, th = int(w*scale), int(h*scale)
+    if img.shape[1] != tw or img.shape[0] != th:
+        img = cv2.resize(img, (tw, th), interpolation=cv2.INTER_AREA)
+    return img, scale
+
+class ImageLRU:
+    """Bounded cache of display-ready images, filled ahead of time by a worker thread."""
+    def __init__(self, paths, max_side, capacity=7, workers=2):
+        self.paths = paths
+        self.max_side = max_side
+        self.capacity = max(1, capacity)
+        self.items = OrderedDict()  # idx -> Future[(disp, scale)]
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def _submit(self, i):
+        if i in self.items:
+            self.items.move_to_end(i)
+        else:
+            self.items[i] = self.pool.submit(load_display, self.paths[i], self.max_side)
+        while len(self.items) > self.capacity:
+            _, fut = self.items.popitem(last=False)
+            fut.cancel()
+
+    def get(self, i):
+        self._submit(i)
+        return self.items[i].result()
+
+    def prefetch(self, idxs):
+        for i in idxs:
+            if 0 <= i < len(self.paths):
+                self._submit(i)
+
+    def close(self):
+        self.pool.shutdown(wait=False)
 
 class AnnotatorLite:
-    def __init__(self, images_dir, out_csv, pattern="*.jpg", start_index=0, max_side=1200):
-        self.paths = sorted(glob.glob(os.path.join(images_dir, pattern)))
+    def __init__(self, images_dir, out_csv, pattern="*.jpg", start_index=0, max_side=1200, store_path="", prefetch=3):
+        self.paths = image_pack.list_images(images_dir, (pattern,))
         if not self.paths:
             print("No images found:", images_dir, pattern)
             sys.exit(1)
         self.out_csv = out_csv
+        self.store = AnnotationStore(store_path or default_store_path(out_csv), seed_csv=out_csv)
         self.idx = max(0, min(start_index, len(self.paths)-1))
         self.boxes = []           # boxes in ORIGINAL coords
-        self.img = None           # original image
         self.disp = None          # display (resized) image
+        self.frame = None         # disp + legend + boxes, as last shown
+        self.dirty = True         # redraw only when something changed
         self.scale = 1.0
         self.max_side = max(0, int(max_side))
+        self.prefetch = max(0, int(prefetch))
+        self.cache = ImageLRU(self.paths, self.max_side, capacity=2*self.prefetch+1)
         self.win = "OOS Annotator Lite"
         cv2.namedWindow(self.win, cv2.WINDOW_NORMAL)
         cv2.resizeWindow(self.win, 1200, 800)
@@ -66,12 +123,7 @@ class AnnotatorLite:
         self.load_image(self.idx)
 
     def compute_scale(self, h, w):
-        if self.max_side <= 0:
-            return 1.0
-        m = max(h, w)
-        if m <= self.max_side:
-            return 1.0
-        return float(self.max_side) / float(m)
+        return display_scale(h, w, self.max_side)
 
     def to_original(self, x, y):
         # map display coords to original coords
@@ -83,18 +135,13 @@ class AnnotatorLite:
         self.idx = i
         p = self.paths[i]
         print(f"[LOAD] {i+1}/{len(self.paths)} -> {os.path.basename(p)}")
-        self.img = cv2.imread(p)
-        if self.img is None:
-            print("  [WARN] Failed to read:", p)
-            self.img = 255 * np.ones((720,1280,3), dtype=np.uint8)
-        h, w = self.img.shape[:2]
-        self.scale = self.compute_scale(h, w)
-        if self.scale != 1.0:
-            self.disp = cv2.resize(self.img, (int(w*self.scale), int(h*self.scale)), interpolation=cv2.INTER_AREA)
-        else:
-            self.disp = self.img.copy()
-        self.boxes = []
-        self.refresh()
+        self.disp, self.scale = self.cache.get(i)
+        # queue neighbours (closest first) so n/p never wait on a decode
+        near = [i + d for k in range(1, self.prefetch+1) for d in (k, -k)]
+        self.cache.prefetch(near)
+        # revisiting an image shows (and keeps) what was saved for it
+        self.boxes = [tuple(int(v) for v in b) for b in self.store.get(os.path.basename(p))]
+        self.dirty = True
 
     def refresh(self):
         v = self.disp.copy()
@@ -107,6 +154,8 @@ class AnnotatorLite:
             dx1, dy1 = int(round(x1*self.scale)), int(round(y1*self.scale))
             dx2, dy2 = int(round(x2*self.scale)), int(round(y2*self.scale))
             cv2.rectangle(v, (dx1,dy1), (dx2,dy2), (0,0,255), 2)
+        self.frame = v
+        self.dirty = False
         cv2.imshow(self.win, v)
 
     def on_mouse(self, event, x, y, flags, param):
@@ -114,9 +163,10 @@ class AnnotatorLite:
             self.drawing = True
             self.x0, self.y0 = x, y
         elif event == cv2.EVENT_MOUSEMOVE and self.drawing:
-            # show temporary rectangle
-            self.refresh()
-            tmp = self.disp.copy()
+            # show temporary rectangle on top of the last rendered frame
+            if self.dirty or self.frame is None:
+                self.refresh()
+            tmp = self.frame.copy()
             cv2.rectangle(tmp, (self.x0, self.y0), (x, y), (0, 0, 255), 2)
             cv2.imshow(self.win, tmp)
         elif event == cv2.EVENT_LBUTTONUP and self.drawing:
@@ -128,33 +178,38 @@ class AnnotatorLite:
             if ox2 > ox1 and oy2 > oy1:
                 self.boxes.append((ox1, oy1, ox2, oy2))
                 print(f"  [+] box {self.boxes[-1]} (orig px)")
-            self.refresh()
+            # always redraw: clears the rubber-band rectangle even if no box was added
+            self.dirty = True
 
     def save_current(self):
         fn = os.path.basename(self.paths[self.idx])
-        rows = [(fn, x1,y1,x2,y2) for (x1,y1,x2,y2) in self.boxes]
-        overwrite_csv(self.out_csv, rows)
-        print(f"[SAVE] {fn} boxes={len(rows)} -> {self.out_csv}")
-        return fn, len(rows)
+        self.store.upsert(fn, self.boxes)
+        print(f"[SAVE] {fn} boxes={len(self.boxes)} -> {self.out_csv}")
+        return fn, len(self.boxes)
 
     def mark_nogaps(self):
         fn = os.path.basename(self.paths[self.idx])
-        overwrite_csv(self.out_csv, [(fn, 0,0,0,0)][:0])  # remove rows for this file
+        self.boxes = []
+        self.dirty = True
+        self.store.upsert(fn, [])  # remove rows for this file
         print(f"[NO-GAPS] {fn} (cleared any existing rows)")
 
     def loop(self):
         print(HELP)
         while True:
-            self.refresh()
+            if self.dirty:
+                self.refresh()
             k = cv2.waitKey(30) & 0xFF
             if k == ord('h'):
                 print(HELP)
             elif k in (ord('u'), 8):
                 if self.boxes:
                     self.boxes.pop()
+                    self.dirty = True
                     print("  [-] undo")
             elif k == ord('c'):
                 self.boxes.clear()
+                self.dirty = True
                 print("  [*] cleared")
             elif k == ord('0'):
                 self.mark_nogaps()
@@ -168,20 +223,26 @@ class AnnotatorLite:
                 self.load_image(max(0, self.idx-1))
             elif k in (27, ord('q')):
                 self.save_current()
+                n = self.store.export_csv(self.out_csv)
+                print(f"[EXPORT] {n} rows -> {self.out_csv}")
                 print("[QUIT] Bye!")
                 break
+        self.cache.close()
+        self.store.close()
         cv2.destroyAllWindows()
 
-def main():
+def main(argv=None):
     ap = argparse.ArgumentParser(description="Quick CSV OOS annotator (lite, resized display).")
     ap.add_argument("--images_dir", required=True, help=r"Folder with images, e.g., data\sku110k_subset_strat\images\test")
     ap.add_argument("--out_csv", required=True, help=r"Output CSV path, e.g., data\oos_gt_main.csv")
     ap.add_argument("--pattern", default="*.jpg", help="Glob pattern, default *.jpg")
     ap.add_argument("--start_index", type=int, default=0, help="Start from this index (in sorted file list)")
     ap.add_argument("--max_side", type=int, default=1200, help="Resize longest image side to this for speed (0=disable)")
-    args = ap.parse_args()
+    ap.add_argument("--store", default="", help="Annotation store (default: <out_csv>.sqlite); CSV is exported from it on quit")
+    ap.add_argument("--prefetch", type=int, default=3, help="Pre-decode this many next/previous images in the background")
+    args = ap.parse_args(argv)
 
-    ann = AnnotatorLite(args.images_dir, args.out_csv, args.pattern, args.start_index, args.max_side)
+    ann = AnnotatorLite(args.images_dir, args.out_csv, args.pattern, args.start_index, args.max_side, args.store, args.prefetch)
     ann.loop()
 
 if __name__ == "__main__":
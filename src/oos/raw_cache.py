@@ -0,0 +1,137 @@
+import os, json, argparse
+from . import profiling
+from ._lazy import lazy_import
+
+np = lazy_import("numpy")
+
+# one forward pass at a low confidence floor with NMS effectively disabled
+# (iou=1.0 never suppresses); every conf/iou setting is then a cheap replay
+CACHE_CONF = 0.001
+CACHE_IOU = 1.0
+CACHE_MAX_DET = 30000
+
+def clamp_boxes(boxes, W, H):
+    """Clamp xyxy boxes to image bounds and drop empty ones (same rule as infer_yolo.run)."""
+    out = []
+    for x1, y1, x2, y2 in boxes:
+        x1 = max(0, min(float(x1), W)); x2 = max(0, min(float(x2), W))
+        y1 = max(0, min(float(y1), H)); y2 = max(0, min(float(y2), H))
+        if x2 > x1 and y2 > y1:
+            out.append([x1, y1, x2, y2])
+    return out
+
+def save_cache(path, names, sizes, boxes, scores, meta, classes=None):
+    """names[i] has boxes[i] (n,4), scores[i] (n,) and classes[i] (n,); stored as flat arrays + offsets."""
+    if classes is None:
+        classes = [np.zeros(len(s)) for s in scores]
+    counts = np.array([len(s) for s in scores], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    flat_b = np.concatenate([np.asarray(b, dtype=np.float32).reshape(-1, 4) for b in boxes]) if names else np.zeros((0, 4), np.float32)
+    flat_s = np.concatenate([np.asarray(s, dtype=np.float32).reshape(-1) for s in scores]) if names else np.zeros((0,), np.float32)
+    flat_c = np.concatenate([np.asarray(c, dtype=np.int32).reshape(-1) for c in classes]) if names else np.zeros((0,), np.int32)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        np.savez(f, names=np.array(names), sizes=np.asarray(sizes, dtype=np.int32).reshape(-1, 2),
+                 offsets=offsets, boxes=flat_b, scores=flat_s, classes=flat_c,
+                 meta=np.array(json.dumps(meta)))
+    return path
+
+class RawCache:
+    def __init__(self, path):
+        z = np.load(path, allow_pickle=False)
+        self.names = [str(n) for n in z["names"]]
+        self.sizes = z["sizes"]
+        self.offsets = z["offsets"]
+        self.boxes = z["boxes"]
+        self.scores = z["scores"]
+        # caches written before class ids were stored: single-class
+        self.classes = z["classes"] if "classes" in z.files else np.zeros(len(self.scores), np.int32)
+        self.meta = json.loads(str(z["meta"]))
+
+    def __len__(self):
+        return len(self.names)
+
+    def image(self, i):
+        a, b = self.offsets[i], self.offsets[i + 1]
+        return self.boxes[a:b], self.scores[a:b], self.classes[a:b]
+
+def nms(boxes, scores, iou_thr, max_det=300, classes=None):
+    """Greedy NMS, vectorized per kept box; returns indices into boxes, best first.
+
+    With classes, boxes only suppress boxes of their own class (ultralytics' default, agnostic=False).
+    """
+    if classes is not None and len(boxes):
+        # shift each class into its own coordinate range so boxes of different classes never overlap
+        boxes = boxes + (classes.astype(boxes.dtype) * (float(boxes.max()) + 1.0))[:, None]
+    order = np.argsort(-scores, kind="stable")
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.maximum(0, x2 - x1) * np.maximum(0, y2 - y1)
+    keep = []
+    while order.size and len(keep) < max_det:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.maximum(0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]))
+        h = np.maximum(0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+        inter = w * h
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+        order = rest[iou <= iou_thr]
+    return np.array(keep, dtype=np.int64)
+
+def postprocess(cache, conf=0.25, iou=0.45, max_det=300, agnostic=False):
+    """Replay conf filter + NMS + clamping over the cache -> standard detections dict (as model.predict would)."""
+    out = {}
+    for i, name in enumerate(cache.names):
+        b, s, c = cache.image(i)
+        m = s > conf  # ultralytics keeps scores strictly above conf
+        b, s, c = b[m], s[m], c[m]
+        if len(s):
+            b = b[nms(b, s, iou, max_det, None if agnostic else c)]
+        W, H = (int(v) for v in cache.sizes[i])
+        out[name] = clamp_boxes(b.tolist(), W, H)
+    return out
+
+def write_json(obj, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f)
+
+def parse_floats(spec):
+    return [float(v) for v in str(spec).split(",") if v.strip()]
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Re-run conf/iou postprocessing on a raw (pre-NMS) prediction cache from `oos infer --raw_cache`.")
+    ap.add_argument("--cache", required=True, help="Raw cache .npz written by infer --raw_cache")
+    ap.add_argument("--conf", default="0.25", help="Confidence threshold, or a comma list for a sweep")
+    ap.add_argument("--iou", default="0.45", help="NMS IoU threshold, or a comma list for a sweep")
+    ap.add_argument("--max_det", type=int, default=300)
+    ap.add_argument("--agnostic", action="store_true", help="Class-agnostic NMS (default: per class, as `oos infer`)")
+    ap.add_argument("--out_json", default="", help="Detections JSON (single conf/iou)")
+    ap.add_argument("--out_dir", default="", help="Sweep output dir: det_conf<c>_iou<i>.json per pair")
+    profiling.add_profile_args(ap)
+    args = ap.parse_args(argv)
+    profiling.start("repost", args)
+
+    with profiling.stage("load_cache"):
+        cache = RawCache(args.cache)
+    confs, ious = parse_floats(args.conf), parse_floats(args.iou)
+    pairs = [(c, i) for c in confs for i in ious]
+    if len(pairs) > 1 and not args.out_dir:
+        raise SystemExit("[ERROR] several conf/iou values need --out_dir")
+    if len(pairs) == 1 and not (args.out_json or args.out_dir):
+        raise SystemExit("[ERROR] need --out_json or --out_dir")
+
+    floor = cache.meta.get("conf_floor", CACHE_CONF)
+    for c, i in pairs:
+        if c < floor:
+            print(f"[WARN] conf {c} is below the cache floor {floor}; results equal conf={floor}")
+        with profiling.stage("postprocess"):
+            det = postprocess(cache, conf=c, iou=i, max_det=args.max_det, agnostic=args.agnostic)
+        path = args.out_json if len(pairs) == 1 and args.out_json else os.path.join(args.out_dir, f"det_conf{c:g}_iou{i:g}.json")
+        write_json(det, path)
+        profiling.count("settings"); profiling.count("images", len(det))
+        print(f"[OK] conf={c:g} iou={i:g}: {sum(len(v) for v in det.values())} boxes over {len(det)} images -> {path}")
+    profiling.finish()
+
+if __name__ == "__main__":
+    main()
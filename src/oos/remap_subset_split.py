@@ -0,0 +1,122 @@
+import os, argparse, shutil, glob
+from concurrent.futures import ThreadPoolExecutor
+from .subset_qc_tools import build_manifest, load_manifest, write_manifest
+
+MODES = ("copy", "hardlink", "symlink", "virtual")
+
+def ensure(d):
+    os.makedirs(d, exist_ok=True)
+
+def same_entry(src, dst):
+    """dst is src's own directory entry (same path, or reached through a linked directory)."""
+    if os.path.normcase(os.path.abspath(src)) == os.path.normcase(os.path.abspath(dst)):
+        return True
+    return not os.path.islink(dst) and os.path.normcase(os.path.realpath(src)) == os.path.normcase(os.path.realpath(dst))
+
+def in_place(src, dst, mode):
+    """dst already is what `mode` would put there. A copy never is: a hardlink or symlink
+    to src at dst would let edits to the subset write through to the source dataset."""
+    if mode == "hardlink":
+        return os.path.exists(dst) and not os.path.islink(dst) and os.path.samefile(src, dst)
+    if mode == "symlink":
+        return os.path.islink(dst) and os.path.realpath(dst) == os.path.realpath(src)
+    return False
+
+def place_file(src, dst, mode="copy"):
+    """Place src at dst; returns False when nothing had to be (or could be) done."""
+    if same_entry(src, dst) or in_place(src, dst, mode):
+        return False
+    # build next to dst and swap it in, so an existing dst is only replaced once the new one exists
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    try:
+        placed = False
+        if mode == "hardlink":
+            try:
+                os.link(src, tmp)
+                placed = True
+            except OSError:
+                # cross-device or unsupported filesystem: fall back to a real copy
+                pass
+        elif mode == "symlink":
+            os.symlink(os.path.abspath(src), tmp)
+            placed = True
+        if not placed:
+            shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        if os.path.lexists(tmp):
+            os.remove(tmp)
+        raise
+    return True
+
+def copy_tree(src, dst, mode="copy", workers=8):
+    """Place every file of src into dst; returns how many were actually placed."""
+    ensure(dst)
+    if not os.path.isdir(src):
+        return 0
+    jobs = [(p, os.path.join(dst, os.path.basename(p)))
+            for p in glob.glob(os.path.join(src, "*")) if os.path.isfile(p)]
+    if mode == "copy" and workers > 1 and len(jobs) > 1:
+        # only real copies are I/O bound enough to be worth a thread pool
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            return sum(ex.map(lambda j: place_file(j[0], j[1], mode), jobs))
+    return sum(place_file(s, d, mode) for s, d in jobs)
+
+def remap_virtual(root, src_split, dst_split, manifest_in="", overwrite=False):
+    """Point <dst_split> at <src_split>'s files inside a manifest; nothing on disk moves."""
+    man = load_manifest(manifest_in) if manifest_in else build_manifest(root)
+    # entries that are already "<split>/<name>" keep pointing at their physical split
+    refs = [e if "/" in e else f"{src_split}/{e}" for e in man.get(src_split, [])]
+    if overwrite or dst_split not in man:
+        man[dst_split] = refs
+    else:
+        seen = set(man[dst_split])
+        man[dst_split] = man[dst_split] + [e for e in refs if e not in seen]
+    return man
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Remap subset split: copy images/<src_split> -> images/<dst_split> and labels/<src_split> -> labels/<dst_split>.")
+    ap.add_argument("--root", required=True, help=r"Subset root (e.g., data\sku110k_eval_stress)")
+    ap.add_argument("--src_split", default="train", help="Source split name (default: train)")
+    ap.add_argument("--dst_split", default="test", help="Destination split name (default: test)")
+    ap.add_argument("--overwrite", action="store_true", help="Overwrite existing files in destination")
+    ap.add_argument("--mode", choices=MODES, default="copy",
+                    help="copy (parallel), hardlink, symlink, or virtual (manifest only, no files touched)")
+    ap.add_argument("--workers", type=int, default=8, help="Copy threads for --mode copy")
+    ap.add_argument("--manifest_in", default="", help="virtual mode: manifest to start from (default: scan --root)")
+    ap.add_argument("--manifest_out", default="outputs/subset_manifest.json", help="virtual mode: where to write the manifest")
+    args = ap.parse_args(argv)
+
+    if args.mode == "virtual":
+        man = remap_virtual(args.root, args.src_split, args.dst_split, args.manifest_in, args.overwrite)
+        mp = write_manifest(man, args.manifest_out)
+        print(f"[OK] Virtual split {args.src_split} -> {args.dst_split}: {len(man[args.dst_split])} entries")
+        print(f"Manifest: {mp}")
+        return
+
+    img_src = os.path.join(args.root, "images", args.src_split)
+    lbl_src = os.path.join(args.root, "labels", args.src_split)
+    img_dst = os.path.join(args.root, "images", args.dst_split)
+    lbl_dst = os.path.join(args.root, "labels", args.dst_split)
+
+    # Optionally clean destination
+    if args.overwrite:
+        for d in (img_dst, lbl_dst):
+            if os.path.isdir(d):
+                for f in glob.glob(os.path.join(d, "*")):
+                    try: os.remove(f)
+                    except: pass
+
+    n_i = copy_tree(img_src, img_dst, args.mode, args.workers)
+    n_l = copy_tree(lbl_src, lbl_dst, args.mode, args.workers)
+
+    verb = {"copy": "Copied", "hardlink": "Hardlinked", "symlink": "Symlinked"}[args.mode]
+    print(f"[OK] {verb} {n_i} images {args.src_split} -> {args.dst_split}")
+    print(f"[OK] {verb} {n_l} labels {args.src_split} -> {args.dst_split}")
+    print(f"Images dst: {img_dst}")
+    print(f"Labels dst: {lbl_dst}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import os, json, heapq, argparse
+from .subset_qc_tools import load_manifest, build_manifest, write_manifest, resolve_entry, count_boxes
+
+HELP = """
+Local multi-process run (each process stands in for a node):
+  oos shard plan --root data/subset --split test --shards 4 --by labels --out_dir outputs/shards
+  # on node i (or: & in a shell loop)
+  oos infer --weights best.pt --images_dir data/subset --manifest outputs/shards/shard_00i.json --split test --out_json outputs/shards/det_i.json
+  oos gaps  --detections_json outputs/shards/det_i.json --images_dir data/subset --manifest outputs/shards/shard_00i.json --split test --out_dir outputs/shards/gaps_i
+  oos eval  --pred_json outputs/shards/gaps_i/oos_regions.json --gt_json data/oos_gt.json --manifest outputs/shards/shard_00i.json --split test --counts_out outputs/shards/counts_i.json
+  # reduce
+  oos shard merge --inputs outputs/shards/gaps_*/oos_regions.json --out_json outputs/oos_regions.json
+  oos shard eval  --counts outputs/shards/counts_*.json --bootstrap 1000
+"""
+
+def entry_weight(root, split, entry, by, boxes=None):
+    img, lbl = resolve_entry(root, split, entry)
+    if by == "size":
+        return os.path.getsize(img) if os.path.isfile(img) else 0
+    if by == "labels":
+        return 1 + count_boxes(lbl)  # per-image overhead + per-box work
+    if by == "json":
+        return 1 + len(boxes.get(os.path.basename(entry), []))
+    return 1
+
+def plan_shards(entries, weights, n):
+    """Greedy longest-processing-time assignment: heaviest entry to the lightest shard."""
+    shards = [[] for _ in range(n)]
+    loads = [0] * n
+    heap = [(0, i) for i in range(n)]
+    for w, e in sorted(zip(weights, entries), key=lambda t: (-t[0], t[1])):
+        load, i = heapq.heappop(heap)
+        shards[i].append(e); loads[i] = load + w
+        heapq.heappush(heap, (loads[i], i))
+    return [sorted(s) for s in shards], loads
+
+def write_plan(root, split, entries, n, by, out_dir, boxes=None):
+    weights = [entry_weight(root, split, e, by, boxes) for e in entries]
+    shards, loads = plan_shards(entries, weights, n)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for i, s in enumerate(shards):
+        # each shard is an ordinary manifest, so every --manifest/--split stage accepts it
+        paths.append(write_manifest({split: s}, os.path.join(out_dir, f"shard_{i:03d}.json")))
+    with open(os.path.join(out_dir, "plan.json"), "w", encoding="utf-8") as f:
+        json.dump({"root": root, "split": split, "by": by, "shards": paths, "loads": loads,
+                   "sizes": [len(s) for s in shards]}, f, indent=2)
+    return paths, loads
+
+def merge_dicts(paths):
+    """Union of per-shard {image: [...]} JSONs; an image may only come from one shard."""
+    out, owner = {}, {}
+    for p in paths:
+        with open(p, "r", encoding="utf-8") as f:
+            part = json.load(f)
+        for k, v in part.items():
+            if k in owner:
+                raise SystemExit(f"[ERROR] {k} appears in both {owner[k]} and {p}; shards overlap")
+            owner[k] = p; out[k] = v
+    return out
+
+def merge_counts(paths):
+    counts, iou_thr = {}, None
+    for p in paths:
+        with open(p, "r", encoding="utf-8") as f:
+            part = json.load(f)
+        if iou_thr is not None and part["iou_thr"] != iou_thr:
+            raise SystemExit(f"[ERROR] {p} used iou_thr={part['iou_thr']}, others {iou_thr}")
+        iou_thr = part["iou_thr"]
+        for k in part["images"]:
+            if k in counts:
+                raise SystemExit(f"[ERROR] {k} counted in more than one shard ({p})")
+        counts.update(part["images"])
+    return counts, iou_thr
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Plan balanced shards of a subset split and reduce per-shard outputs.",
+                                 epilog=HELP, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="action", required=True)
+    p = sub.add_parser("plan", help="Split a manifest/split into N balanced shard manifests")
+    p.add_argument("--root", required=True, help="Subset root (images/<split>, labels/<split>)")
+    p.add_argument("--split", default="test")
+    p.add_argument("--manifest_in", default="", help="Source manifest (default: list images/<split>)")
+    p.add_argument("--shards", type=int, required=True, help="Number of shards / nodes")
+    p.add_argument("--by", choices=["size", "labels", "json", "count"], default="size",
+                   help="Balance by image file size, label box count, box count in --boxes_json, or image count")
+    p.add_argument("--boxes_json", default="", help="Detections JSON from an earlier run (for --by json)")
+    p.add_argument("--out_dir", required=True, help="Writes shard_000.json ... and plan.json")
+    m = sub.add_parser("merge", help="Merge per-shard detections / oos_regions JSONs")
+    m.add_argument("--inputs", nargs="+", required=True)
+    m.add_argument("--out_json", required=True)
+    e = sub.add_parser("eval", help="Exact precision/recall + bootstrap from per-shard `oos eval --counts_out` files")
+    e.add_argument("--counts", nargs="+", required=True)
+    e.add_argument("--bootstrap", type=int, default=1000, help="Bootstrap iterations")
+    args = ap.parse_args(argv)
+
+    if args.action == "plan":
+        man = load_manifest(args.manifest_in) if args.manifest_in else build_manifest(args.root)
+        entries = man.get(args.split, [])
+        if not entries:
+            raise SystemExit(f"[ERROR] no entries for split '{args.split}'")
+        boxes = None
+        if args.by == "json":
+            if not args.boxes_json:
+                raise SystemExit("[ERROR] --by json needs --boxes_json")
+            with open(args.boxes_json, "r", encoding="utf-8") as f:
+                boxes = json.load(f)
+        paths, loads = write_plan(args.root, args.split, entries, max(1, args.shards), args.by, args.out_dir, boxes)
+        spread = max(loads) / max(1, min(loads)) if loads else 1.0
+        print(f"[OK] {len(entries)} entries -> {len(paths)} shards in {args.out_dir} (max/min load {spread:.3f})")
+    elif args.action == "merge":
+        out = merge_dicts(args.inputs)
+        os.makedirs(os.path.dirname(args.out_json) or ".", exist_ok=True)
+        with open(args.out_json, "w", encoding="utf-8") as f:
+            json.dump(out, f)
+        print(f"[OK] merged {len(args.inputs)} shards ({len(out)} images) into {args.out_json}")
+    else:
+        from .oos_eval_bootstrap import pr_from_counts, bootstrap_counts, print_report
+        counts, iou_thr = merge_counts(args.counts)
+        prec, rec, tp, fp, fn = pr_from_counts(counts)
+        print_report(prec, rec, tp, fp, fn, iou_thr, bootstrap_counts(counts, B=args.bootstrap))
+        print(f"[OK] reduced {len(args.counts)} shards ({len(counts)} images)")
+
+if __name__ == "__main__":
+    main()
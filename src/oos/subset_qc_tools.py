@@ -28,16 +28,42 @@ def which_bin(n, bins):
             return i
     return None
 
-def counts_by_bin(root: str, bins):
+def load_manifest(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def resolve_entry(root: str, split: str, entry: str):
+    # manifest entries are bare names (file lives in images/<split>) or
+    # "<other_split>/<name>" for virtual splits that reference files in place
+    src_split, name = entry.split("/", 1) if "/" in entry else (split, entry)
+    img = os.path.join(root, "images", src_split, name)
+    lbl = os.path.join(root, "labels", src_split, os.path.splitext(name)[0] + ".txt")
+    return img, lbl
+
+def split_images(root: str, split: str, manifest=None):
+    """Image paths of a split, from the manifest if given, else from images/<split>."""
+    if manifest is not None:
+        return [resolve_entry(root, split, e)[0] for e in manifest.get(split, [])]
+    return sorted(glob.glob(os.path.join(root, "images", split, "*.jpg")))
+
+def split_labels(root: str, split: str, manifest=None):
+    """Label paths of a split, from the manifest if given, else from labels/<split>."""
+    if manifest is not None:
+        return [resolve_entry(root, split, e)[1] for e in manifest.get(split, [])]
+    return sorted(glob.glob(os.path.join(root, "labels", split, "*.txt")))
+
+def counts_by_bin(root: str, bins, manifest=None):
     report = {}
     for split in ["train","val","test"]:
         lbl_dir = os.path.join(root, "labels", split)
-        if not os.path.isdir(lbl_dir):
+        if manifest is None and not os.path.isdir(lbl_dir):
             report[split] = {"total": 0, "bins": [0]*len(bins)}
             continue
         totals = [0]*len(bins)
         total_files = 0
-        for p in glob.glob(os.path.join(lbl_dir, "*.txt")):
+        for p in split_labels(root, split, manifest):
+            if manifest is not None and not os.path.isfile(p):
+                continue
             n = count_boxes(p)
             idx = which_bin(n, bins)
             if idx is not None:
@@ -46,15 +72,17 @@ def counts_by_bin(root: str, bins):
         report[split] = {"total": total_files, "bins": totals}
     return report
 
-def parity_check(root: str):
+def parity_check(root: str, manifest=None):
     out = {}
     for split in ["train","val","test"]:
-        img_dir = os.path.join(root, "images", split)
-        lbl_dir = os.path.join(root, "labels", split)
-        imgs = set(os.path.splitext(os.path.basename(p))[0] 
-                   for p in glob.glob(os.path.join(img_dir, "*.jpg")))
-        lbls = set(os.path.splitext(os.path.basename(p))[0] 
-                   for p in glob.glob(os.path.join(lbl_dir, "*.txt")))
+        img_paths = split_images(root, split, manifest)
+        lbl_paths = split_labels(root, split, manifest)
+        if manifest is not None:
+            # virtual splits: entries only count if the referenced file exists
+            img_paths = [p for p in img_paths if os.path.isfile(p)]
+            lbl_paths = [p for p in lbl_paths if os.path.isfile(p)]
+        imgs = set(os.path.splitext(os.path.basename(p))[0] for p in img_paths)
+        lbls = set(os.path.splitext(os.path.basename(p))[0] for p in lbl_paths)
         out[split] = {
             "num_images": len(imgs),
             "num_labels": len(lbls),
@@ -65,35 +93,43 @@ def parity_check(root: str):
         }
     return out
 
-def make_manifest(root: str, out_path: str):
+def build_manifest(root: str):
     man = {}
     for split in ["train","val","test"]:
         img_dir = os.path.join(root, "images", split)
         files = sorted(os.path.basename(p) for p in glob.glob(os.path.join(img_dir, "*.jpg")))
         man[split] = files
-    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    return man
+
+def make_manifest(root: str, out_path: str):
+    return write_manifest(build_manifest(root), out_path)
+
+def write_manifest(man, out_path: str):
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
     with open(out_path, "w", encoding="utf-8") as f:
         json.dump(man, f, indent=2)
     return out_path
 
-if __name__ == "__main__":
+def main(argv=None):
     ap = argparse.ArgumentParser(description="Subset QC: bin coverage, image/label parity, manifest export.")
     ap.add_argument("--root", required=True, help=r"Subset root (e.g., data\sku110k_subset_strat)")
     ap.add_argument("--bins", default="0-10,11-30,31-80,81-150,151-9999", help="Density bins for YOLO box counts")
     ap.add_argument("--manifest_out", default="outputs/subset_manifest.json", help="Where to write the manifest JSON")
-    args = ap.parse_args()
+    ap.add_argument("--manifest_in", default="", help="Optional manifest defining (virtual) splits; checks it instead of the directories")
+    args = ap.parse_args(argv)
 
     bins = parse_bins(args.bins)
+    manifest = load_manifest(args.manifest_in) if args.manifest_in else None
 
     print("== 1) Coverage by density bins ==")
-    cov = counts_by_bin(args.root, bins)
+    cov = counts_by_bin(args.root, bins, manifest)
     for split, info in cov.items():
         print(f"\n[{split.upper()}] total label files: {info['total']}")
         for i,(a,b) in enumerate(bins):
             print(f"  bin {i} [{a}-{b}]: {info['bins'][i]}")
 
     print("\n== 2) Image/label parity ==")
-    par = parity_check(args.root)
+    par = parity_check(args.root, manifest)
     for split, info in par.items():
         print(f"\n[{split.upper()}] imgs={info['num_images']} labels={info['num_labels']} missing_labels={info['num_missing_labels']} orphan_labels={info['num_orphan_labels']}")
         if info['num_missing_labels']>0:
@@ -102,5 +138,11 @@ if __name__ == "__main__":
             print("  e.g., orphans (first 10):", info['orphan_labels'])
 
     print("\n== 3) Manifest export ==")
-    mp = make_manifest(args.root, args.manifest_out)
-    print("[OK] Wrote manifest to", mp)
+    if args.manifest_in and os.path.abspath(args.manifest_in) == os.path.abspath(args.manifest_out):
+        print("[SKIP] --manifest_out is the input manifest; not overwriting it")
+    else:
+        mp = make_manifest(args.root, args.manifest_out)
+        print("[OK] Wrote manifest to", mp)
+
+if __name__ == "__main__":
+    main()